@@ -1,4 +1,8 @@
+import asyncio
+import hashlib
 import subprocess
+import threading
+import time
 import json
 import os
 import sys
@@ -6,101 +10,333 @@ import sys
 # Define the directory where the scripts are located
 SCRIPTS_DIR = 'scripts'
 
-def handler(event, context):
+# Live runs are judged with the same test as the precomputed bundle
+sys.path.insert(0, os.path.abspath(SCRIPTS_DIR))
+from build_results import probe_succeeded
+
+# A list of allowed scripts to prevent execution of arbitrary files
+ALLOWED_SCRIPTS = [
+    'CMB.py',
+    'Cosmic_Chronometers.py',
+    'SNIa.py',
+    'bao.py',
+    'cluster_deficit_calc.py',
+    'galaxy_2pcf_check.py',
+    'validate_bao_hz.py'
+]
+
+# Parameter keys each script accepts (read from the SCRIPT_PARAMETERS JSON).
+# None of the page scripts takes parameters yet; anything not listed here is
+# rejected, so arbitrary values cannot bypass the bundle or the coalescing.
+ALLOWED_PARAMETERS = {script: set() for script in ALLOWED_SCRIPTS}
+
+# A 60-second timeout to prevent long-running processes (time spent queued is not counted)
+SCRIPT_TIMEOUT = 60
+# Maximum number of scripts running at the same time
+MAX_WORKERS = int(os.environ.get('RUN_SCRIPT_MAX_WORKERS', os.cpu_count() or 1))
+# Maximum number of distinct computations allowed to wait for a worker
+MAX_QUEUE_DEPTH = int(os.environ.get('RUN_SCRIPT_MAX_QUEUE_DEPTH', 32))
+
+# Set up the response headers to allow CORS (Cross-Origin Resource Sharing)
+HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "POST, GET, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type"
+}
+
+
+def _response(status_code, body, headers=None):
+    return {
+        'statusCode': status_code,
+        'headers': {**HEADERS, **(headers or {})},
+        'body': json.dumps(body) if not isinstance(body, str) else body
+    }
+
+
+def _validate_script(script_name):
+    """Returns an error response for an invalid script name, or None if it may run."""
+    if not script_name or not script_name.endswith('.py'):
+        return _response(400, {"error": "Invalid or missing scriptName."})
+
+    # A security check: ensure the script path is within the designated scripts directory
+    # This prevents directory traversal attacks
+    script_path = os.path.join(SCRIPTS_DIR, script_name)
+    if not os.path.realpath(script_path).startswith(os.path.realpath(SCRIPTS_DIR)):
+        return _response(403, {"error": "Unauthorized script path."})
+
+    if script_name not in ALLOWED_SCRIPTS:
+        return _response(403, {"error": "Script is not in the list of allowed scripts."})
+    return None
+
+
+def _validate_parameters(script_name, parameters):
+    """Returns an error response for parameters the script does not accept, or None."""
+    if not isinstance(parameters, dict):
+        return _response(400, {"error": "parameters must be a JSON object."})
+    unknown = sorted(set(parameters) - ALLOWED_PARAMETERS.get(script_name, set()))
+    if unknown:
+        accepted = sorted(ALLOWED_PARAMETERS.get(script_name, set()))
+        return _response(400, {"error": f"{script_name} does not accept parameters: {', '.join(unknown)}.",
+                               "accepted_parameters": accepted})
+    return None
+
+
+# --- Input hashing ---
+# Scripts are pure functions of their source and the data files next to them,
+# so identical (script, parameters, data hash) requests give identical output.
+_hash_cache = {}
+
+def _file_hash(path):
+    stat = os.stat(path)
+    cached = _hash_cache.get(path)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    _hash_cache[path] = ((stat.st_mtime_ns, stat.st_size), digest.hexdigest())
+    return digest.hexdigest()
+
+def data_hash(script_name):
+    """Hash of the script and of every data file in the scripts directory."""
+    digest = hashlib.sha256()
+    data_files = sorted(name for name in os.listdir(SCRIPTS_DIR)
+                        if not name.endswith('.py') and os.path.isfile(os.path.join(SCRIPTS_DIR, name)))
+    for name in [script_name] + data_files:
+        digest.update(name.encode())
+        digest.update(_file_hash(os.path.join(SCRIPTS_DIR, name)).encode())
+    return digest.hexdigest()
+
+
+# --- Precomputed results ---
+# scripts/build_results.py writes the output of every probe at the published
+# parameters to this bundle, together with the hashes of its inputs. An entry
+# is served as long as none of its inputs changed.
+RESULTS_BUNDLE = os.path.join('results', 'results.json')
+_bundle_cache = {}
+
+def _load_bundle():
+    try:
+        mtime = os.stat(RESULTS_BUNDLE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _bundle_cache.get('mtime') != mtime:
+        with open(RESULTS_BUNDLE) as f:
+            _bundle_cache.update({'mtime': mtime, 'bundle': json.load(f)})
+    return _bundle_cache['bundle']
+
+def precomputed_result(script_name):
+    """Returns (bundle, entry) for an up-to-date bundle entry, or None."""
+    bundle = _load_bundle()
+    entry = bundle and bundle.get('probes', {}).get(script_name)
+    if not entry or not entry.get('success'):
+        return None
+    for path, expected in entry['inputs'].items():
+        current = _file_hash(path) if os.path.exists(path) else 'missing'
+        if current != expected:
+            return None
+    return bundle, entry
+
+
+# --- Shared event loop ---
+# A single background loop serves every invocation handled by this process, so
+# concurrent identical requests can share one in-flight computation.
+_loop = None
+_loop_lock = threading.Lock()
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='run-script-loop', daemon=True).start()
+        return _loop
+
+
+class ScriptRunner:
     """
-    Vercel serverless function to run a specified Python script.
+    Runs scripts on a bounded worker pool with single-flight coalescing:
+    requests with the same key await the same computation, at most
+    max_workers scripts run at once, and at most max_queue_depth distinct
+    computations wait for a worker (further ones are rejected with 429).
+    Must be used from the event loop that created it.
+
+    Coalescing is per process: it only merges requests handled concurrently
+    by the same instance. On platforms that give each instance one event at
+    a time (Vercel, Lambda) it rarely triggers; the precomputed bundle is what
+    absorbs repeated requests there.
     """
-    # Set up the response headers to allow CORS (Cross-Origin Resource Sharing)
-    headers = {
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "POST, GET, OPTIONS",
-        "Access-Control-Allow-Headers": "Content-Type"
-    }
 
-    # Handle preflight CORS requests
-    if event['httpMethod'] == 'OPTIONS':
+    def __init__(self, max_workers=MAX_WORKERS, max_queue_depth=MAX_QUEUE_DEPTH):
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._slots = asyncio.Semaphore(max_workers)
+        self._inflight = {}
+        self.queue_depth = 0
+        self.running = 0
+        self.coalesced = 0
+        self.executed = 0
+        self.rejected = 0
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue_depth, "running": self.running, "in_flight": len(self._inflight),
+            "max_workers": self.max_workers, "max_queue_depth": self.max_queue_depth,
+            "executed": self.executed, "coalesced": self.coalesced, "rejected": self.rejected,
+        }
+
+    async def run(self, script_name, parameters):
+        """Returns (result, info) where info tells whether the run was shared or rejected."""
+        key = (script_name, json.dumps(parameters, sort_keys=True), data_hash(script_name))
+        while key in self._inflight:
+            future = self._inflight[key]
+            self.coalesced += 1
+            try:
+                result = await asyncio.shield(future)
+                return result, {"coalesced": True}
+            except asyncio.CancelledError:
+                # Only the shared run was cancelled (its leading request went
+                # away): start it again instead of failing this request
+                if not future.cancelled():
+                    raise
+
+        if self.queue_depth >= self.max_queue_depth:
+            self.rejected += 1
+            return None, {"rejected": True}
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._execute(script_name, parameters)
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case no other request is waiting
+            future.exception()
+            raise
+        finally:
+            # Also reached on cancellation (not an Exception): never leave coalesced waiters hanging
+            if not future.done():
+                future.cancel()
+            del self._inflight[key]
+        return result, {"coalesced": False}
+
+    async def _execute(self, script_name, parameters):
+        queued_at = time.monotonic()
+        self.queue_depth += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queue_depth -= 1
+        wait_time = time.monotonic() - queued_at
+
+        self.running += 1
+        started_at = time.monotonic()
+        try:
+            # Parameters are passed to the script as JSON in SCRIPT_PARAMETERS
+            env = {**os.environ, 'SCRIPT_PARAMETERS': json.dumps(parameters)}
+            # Run from the scripts directory (as build_results.py does) so data files are found
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, script_name, cwd=SCRIPTS_DIR,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=SCRIPT_TIMEOUT)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise subprocess.TimeoutExpired(script_name, SCRIPT_TIMEOUT)
+        finally:
+            self.running -= 1
+            self._slots.release()
+            self.executed += 1
+
         return {
-            'statusCode': 200,
-            'headers': headers,
-            'body': ''
+            "returncode": process.returncode,
+            "stdout": stdout.decode(errors='replace'),
+            "stderr": stderr.decode(errors='replace'),
+            "wait_time": wait_time,
+            "run_time": time.monotonic() - started_at,
         }
 
+
+_runner = None
+
+def _get_runner():
+    global _runner
+    if _runner is None:
+        _runner = ScriptRunner()
+    return _runner
+
+
+async def handle_async(event):
+    """Async request path; must run on the shared loop (see handler)."""
+    # Handle preflight CORS requests
+    if event['httpMethod'] == 'OPTIONS':
+        return _response(200, '')
+
     try:
         # Check for the presence of the 'scriptName' in the POST body
         body = json.loads(event['body'])
         script_name = body.get('scriptName')
+        error = _validate_script(script_name)
+        if error:
+            return error
 
-        if not script_name or not script_name.endswith('.py'):
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({"error": "Invalid or missing scriptName."})
-            }
-
-        # Construct the full path to the script
-        script_path = os.path.join(SCRIPTS_DIR, script_name)
-
-        # A security check: ensure the script path is within the designated scripts directory
-        # This prevents directory traversal attacks
-        if not os.path.realpath(script_path).startswith(os.path.realpath(SCRIPTS_DIR)):
-            return {
-                'statusCode': 403,
-                'headers': headers,
-                'body': json.dumps({"error": "Unauthorized script path."})
-            }
-
-        # A list of allowed scripts to prevent execution of arbitrary files
-        allowed_scripts = [
-            'CMB.py',
-            'Cosmic_Chronometers.py',
-            'SNIa.py',
-            'bao.py',
-            'cluster_deficit_calc.py',
-            'galaxy_2pcf_check.py',
-            'validate_bao_hz.py'
-        ]
-
-        if script_name not in allowed_scripts:
-            return {
-                'statusCode': 403,
-                'headers': headers,
-                'body': json.dumps({"error": "Script is not in the list of allowed scripts."})
-            }
-
-        # Use subprocess to execute the script and capture its output
-        result = subprocess.run(
-            [sys.executable, script_path], 
-            capture_output=True, 
-            text=True,
-            timeout=60 # A 60-second timeout to prevent long-running processes
-        )
-
-        # Check for errors in script execution
-        if result.returncode != 0:
-            return {
-                'statusCode': 500,
-                'headers': headers,
-                'body': json.dumps({
-                    "success": False,
-                    "output": result.stdout,
-                    "error": result.stderr
-                })
-            }
-        
-        # Return the script's output
-        return {
-            'statusCode': 200,
-            'headers': headers,
-            'body': json.dumps({
+        parameters = body.get('parameters') or {}
+        error = _validate_parameters(script_name, parameters)
+        if error:
+            return error
+        precomputed = None if parameters else precomputed_result(script_name)
+        if precomputed:
+            bundle, entry = precomputed
+            return _response(200, {
                 "success": True,
-                "output": result.stdout
+                "output": entry["output"],
+                "precomputed": {"bundle_version": bundle["bundle_version"], "computed_at": entry["computed_at"],
+                                "runtime_s": entry["runtime_s"], "input_hash": entry["input_hash"]}
             })
-        }
 
+        runner = _get_runner()
+        requested_at = time.monotonic()
+        result, info = await runner.run(script_name, parameters)
+        stats = {**runner.stats(), "coalesced_request": info.get("coalesced", False),
+                 "request_wait_time": round(time.monotonic() - requested_at, 3)}
+
+        if info.get("rejected"):
+            # Backpressure: the queue is full, tell the client when to come back
+            return _response(429, {"error": "Too many scripts queued, please retry shortly.", "stats": stats},
+                             headers={"Retry-After": "5"})
+
+        stats.update({"queue_wait_time": round(result["wait_time"], 3), "run_time": round(result["run_time"], 3)})
+
+        # Check for errors in script execution (a clean exit without the final
+        # result, or with an '-> ERROR' line, is a failure too)
+        if not probe_succeeded(script_name, result["returncode"], result["stdout"]):
+            return _response(500, {
+                "success": False,
+                "output": result["stdout"],
+                "error": result["stderr"] or "Script did not produce its final result.",
+                "stats": stats
+            })
+
+        # Return the script's output
+        return _response(200, {
+            "success": True,
+            "output": result["stdout"],
+            "stats": stats
+        })
+
+    except subprocess.TimeoutExpired:
+        return _response(504, {"error": f"Script exceeded the {SCRIPT_TIMEOUT}-second timeout."})
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': headers,
-            'body': json.dumps({"error": f"Internal Server Error: {str(e)}"})
-        }
+        return _response(500, {"error": f"Internal Server Error: {str(e)}"})
+
 
+def handler(event, context):
+    """
+    Vercel serverless function to run a specified Python script.
+    Requests are handed to the shared event loop so that concurrent identical
+    requests in this process are coalesced into a single script run.
+    """
+    return asyncio.run_coroutine_threadsafe(handle_async(event), _get_loop()).result()
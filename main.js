@@ -578,6 +578,55 @@ async function loadCMBData(fileName) {
     }
 }
 
+// Precomputed results bundle (built by scripts/build_results.py)
+let resultsBundlePromise = null;
+
+function loadResultsBundle() {
+    if (!resultsBundlePromise) {
+        resultsBundlePromise = fetch('results/results.json', {cache: 'no-cache'})
+            .then(response => response.ok ? response.json() : null)
+            .catch(() => null);
+    }
+    return resultsBundlePromise;
+}
+
+// sha256 of a served file, or 'missing' (same convention as build_results.py)
+async function fileHash(path) {
+    try {
+        const response = await fetch(path);
+        if (!response.ok) return 'missing';
+        const digest = await crypto.subtle.digest('SHA-256', await response.arrayBuffer());
+        return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+    } catch (error) {
+        return 'missing';
+    }
+}
+
+// Returns the bundle entry of a script if it succeeded and was computed from
+// the script served now. Data files are not re-hashed here: the bundle is
+// checked against every input at deploy time (build_results.py --check in CI)
+async function precomputedResult(scriptName) {
+    const bundle = await loadResultsBundle();
+    const entry = bundle && bundle.probes && bundle.probes[scriptName];
+    if (!entry || !entry.success) return null;
+    const scriptPath = `scripts/${scriptName}`;
+    if (entry.inputs[scriptPath] && await fileHash(scriptPath) !== entry.inputs[scriptPath]) {
+        addConsoleMessage(`[INFO] Precomputed result is out of date (${scriptPath} changed), running live...`, 'info');
+        return null;
+    }
+    return {bundle, entry};
+}
+
+// Highlight key cosmological values and convert line breaks
+function formatScriptOutput(output) {
+    let formattedOutput = output;
+    formattedOutput = formattedOutput.replace(/(χ²\/dof\s*=\s*\d+\.\d+)/g, '<strong class="cosmo-value">$1</strong>');
+    formattedOutput = formattedOutput.replace(/(H0\s*=\s*\d+\.\d+)/gi, '<strong class="cosmo-value">$1</strong>');
+    formattedOutput = formattedOutput.replace(/(Chi\^2\s*=\s*\d+\.\d+)/gi, '<strong class="cosmo-value">$1</strong>');
+    formattedOutput = formattedOutput.replace(/(χ²\s*=\s*\d+\.\d+)/gi, '<strong class="cosmo-value">$1</strong>');
+    return formattedOutput.replace(/\n/g, '<br>');
+}
+
 // Main function to execute scripts
 async function runScript(scriptName) {
     // UI Elements
@@ -597,6 +646,18 @@ async function runScript(scriptName) {
     addConsoleMessage(`> python ${scriptName}`, 'command');
 
     try {
+        // ====================================================
+        // PHASE 0: PRECOMPUTED RESULTS
+        // ====================================================
+        const cached = await precomputedResult(scriptName);
+        if (cached) {
+            const {bundle, entry: precomputed} = cached;
+            addConsoleMessage(`[SUCCESS] Precomputed result (bundle v${bundle.bundle_version}, computed ${precomputed.computed_at} in ${precomputed.runtime_s.toFixed(2)} s)`, 'success');
+            addConsoleMessage(`[INFO] Input hash: ${precomputed.input_hash.slice(0, 12)}`, 'info');
+            addConsoleMessage(formatScriptOutput(precomputed.output), 'output');
+            return;
+        }
+
         // ====================================================
         // PHASE 1: SCRIPT CONTENT RETRIEVAL
         // ====================================================
@@ -666,18 +727,7 @@ async function runScript(scriptName) {
             addConsoleMessage(`[SUCCESS] Execution completed successfully!`, 'success');
             
             // Special formatting for cosmological results
-            let formattedOutput = API_DATA.reply;
-            
-            // Highlight key cosmological values
-            formattedOutput = formattedOutput.replace(/(χ²\/dof\s*=\s*\d+\.\d+)/g, '<strong class="cosmo-value">$1</strong>');
-            formattedOutput = formattedOutput.replace(/(H0\s*=\s*\d+\.\d+)/gi, '<strong class="cosmo-value">$1</strong>');
-            formattedOutput = formattedOutput.replace(/(Chi\^2\s*=\s*\d+\.\d+)/gi, '<strong class="cosmo-value">$1</strong>');
-            formattedOutput = formattedOutput.replace(/(χ²\s*=\s*\d+\.\d+)/gi, '<strong class="cosmo-value">$1</strong>');
-            
-            // Convert line breaks
-            formattedOutput = formattedOutput.replace(/\n/g, '<br>');
-            
-            addConsoleMessage(formattedOutput, 'output');
+            addConsoleMessage(formatScriptOutput(API_DATA.reply), 'output');
         } else {
             throw new Error('Invalid API response. Expected structure: {reply: "output"}');
         }
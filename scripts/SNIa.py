@@ -4,6 +4,7 @@ import platform
 import sys
 from scipy.integrate import quad # Using quad for higher precision
 import io
+from scipy.linalg import cho_factor, cho_solve
 
 # ==============================================================================
 # Dynamic Fractal Cosmological Model - Pantheon+ SNIa Chi-squared Script (v2.0)
@@ -67,6 +68,48 @@ def mu_model(z, H0, Om, Gamma, A1, A2):
     # C_LIGHT is in km/s, H0 is in km/s/Mpc. So integral is in Mpc.
     return 5 * np.log10(dl) + 25
 
+def load_covariance_block(path, indices, rows_per_chunk=64):
+    """
+    Streams the Pantheon+ covariance file (first line: N, then the N*N values)
+    and keeps only the rows/columns in indices, in float32. The full float64
+    matrix is never held in memory.
+    """
+    with open(path) as f:
+        n_total = int(f.readline().split()[0])
+    position = np.full(n_total, -1)
+    position[indices] = np.arange(len(indices))
+    block = np.empty((len(indices), len(indices)), dtype=np.float32)
+    values = np.empty(0)
+    row = 0
+    for chunk in pd.read_csv(path, skiprows=1, header=None, sep=r'\s+', dtype=np.float64,
+                             chunksize=n_total * rows_per_chunk):
+        values = np.concatenate((values, chunk.values.ravel()))
+        n_rows = len(values) // n_total
+        if row + n_rows > n_total:
+            raise ValueError(f"{path}: expected {n_total} rows of covariance, found more.")
+        rows = values[:n_rows * n_total].reshape(n_rows, n_total)
+        values = values[n_rows * n_total:]
+        keep = position[row:row + n_rows] >= 0
+        block[position[row:row + n_rows][keep]] = rows[keep][:, indices]
+        row += n_rows
+    if row != n_total or values.size:
+        raise ValueError(f"{path}: expected {n_total} rows of covariance, found {row}"
+                         + (f" and {values.size} trailing values." if values.size else "."))
+    return block
+
+def chi2_cholesky(cov, residual, refine_steps=3, block_rows=256):
+    """
+    r^T C^-1 r with a float32 Cholesky factorization of C, refined in float64
+    (residuals computed block by block, so no float64 copy of C is made).
+    """
+    factor = cho_factor(cov, lower=True)
+    x = cho_solve(factor, residual.astype(cov.dtype)).astype(np.float64)
+    for _ in range(refine_steps):
+        cx = np.concatenate([cov[i:i + block_rows].astype(np.float64) @ x
+                             for i in range(0, len(x), block_rows)])
+        x += cho_solve(factor, (residual - cx).astype(cov.dtype))
+    return residual @ x
+
 # --- 2. Data and GLOBAL Optimized Parameters ---
 print("--- Script for Pantheon+ SNIa using GLOBAL fit parameters ---")
 print("\n[STEP 1] Loading Pantheon+ data and covariance matrix.")
@@ -85,10 +128,9 @@ try:
     num_total_sn = len(snia_data_df)
     non_calibrator_indices = snia_data_df.index[~is_calibrator_mask].values
     
-    # Load covariance matrix
-    cov_data = np.loadtxt('Pantheon+SH0ES_STAT+SYS.cov', skiprows=1)
-    full_cov_matrix = cov_data.reshape((num_total_sn, num_total_sn))
-    cov_matrix = full_cov_matrix[non_calibrator_indices, :][:, non_calibrator_indices]
+    # Load covariance matrix: only the non-calibrator block is kept, in float32
+    # (the Chi^2 solve is refined in float64)
+    cov_matrix = load_covariance_block('Pantheon+SH0ES_STAT+SYS.cov', non_calibrator_indices)
 
     num_data_points = len(z_data)
     print(f"-> Successfully loaded {num_data_points} non-calibrator SNIa.")
@@ -96,6 +138,9 @@ try:
 except FileNotFoundError:
     print("-> ERROR: Data files 'Pantheon+SH0ES.dat' or 'Pantheon+SH0ES_STAT+SYS.cov' not found.")
     sys.exit()
+except ValueError as exc:
+    print(f"-> ERROR: {exc}")
+    sys.exit()
 
 
 print("\n[STEP 2] Defining the GLOBAL best-fit parameters from the paper.")
@@ -109,8 +154,7 @@ mu_model_pred = np.array([mu_model(z, *model_args) for z in z_data])
 
 print("\n[STEP 4] Computing the Chi-squared value.")
 diff_vector = mu_obs - mu_model_pred
-inv_cov_matrix = np.linalg.inv(cov_matrix)
-chi2_snia = diff_vector.T @ inv_cov_matrix @ diff_vector
+chi2_snia = chi2_cholesky(cov_matrix, diff_vector)
 
 # --- 4. Final Results ---
 print("\n[STEP 5] Calculating the final Chi^2/dof.")
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Precomputed Results Builder (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# Every probe's output at the published parameters is a pure function of its
+# script and data files. This build step runs the probes once and writes a
+# versioned JSON bundle (results/results.json) with their output, extracted
+# FINAL RESULT values, timings and input hashes. The reproducibility page and
+# the API serve this bundle instead of running the scripts on each click.
+#
+# Rebuilds are incremental: only probes whose script or data hash changed are
+# recomputed, in parallel.
+#
+# Usage:
+#   python build_results.py            # incremental rebuild
+#   python build_results.py --force    # recompute every probe
+#   python build_results.py --check    # exit 1 if the bundle is stale (CI / deploy step)
+# ==============================================================================
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+BUNDLE_PATH = os.path.join(REPO_DIR, 'results', 'results.json')
+SCHEMA_VERSION = 1
+
+# Probes served by the page, with the data files each one reads (paths relative to scripts/)
+PROBE_INPUTS = {
+    'CMB.py': ['COM_PowerSpect_CMB-TT-full_R3.01.txt'],
+    'Cosmic_Chronometers.py': [],
+    'SNIa.py': ['Pantheon+SH0ES.dat', 'Pantheon+SH0ES_STAT+SYS.cov'],
+    'bao.py': [],
+    'cluster_deficit_calc.py': [],
+    'galaxy_2pcf_check.py': [],
+    'validate_bao_hz.py': [],
+}
+# Line that marks a complete run; probes print 'FINAL RESULT:' unless listed here
+COMPLETION_MARKERS = {
+    'validate_bao_hz.py': '### Global Performance Summary ###',
+}
+# Probes report missing data or inputs on stdout, some of them with exit status 0
+ERROR_MARKER = re.compile(r'^-> ERROR', re.MULTILINE)
+
+# Inputs shared by every probe (paths relative to the repository root)
+SHARED_INPUTS = ['requirements.txt']
+
+def file_hash(path):
+    """sha256 of a file, or 'missing' if it does not exist."""
+    if not os.path.exists(path):
+        return 'missing'
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def probe_inputs(script_name):
+    """Maps every input of a probe (repo-relative path) to its hash."""
+    paths = [f'scripts/{name}' for name in [script_name] + PROBE_INPUTS[script_name]] + SHARED_INPUTS
+    return {path: file_hash(os.path.join(REPO_DIR, path)) for path in paths}
+
+def combined_hash(inputs):
+    digest = hashlib.sha256()
+    for path in sorted(inputs):
+        digest.update(f'{path}:{inputs[path]}\n'.encode())
+    return digest.hexdigest()
+
+FINAL_RESULT = re.compile(r'FINAL RESULT:\s*(.+?)\s+=\s+([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)')
+
+def extract_values(output):
+    """Collects the 'FINAL RESULT: label = number' lines of a probe's output."""
+    return {label: float(value) for label, value in FINAL_RESULT.findall(output)}
+
+def probe_succeeded(script_name, returncode, output):
+    """A run counts as successful only if it exited cleanly, reached its final line and reported no error."""
+    return (returncode == 0 and COMPLETION_MARKERS.get(script_name, 'FINAL RESULT:') in output
+            and not ERROR_MARKER.search(output))
+
+def run_probe(script_name, timeout=600):
+    """Runs one probe from the scripts directory and returns its bundle entry."""
+    inputs = probe_inputs(script_name)
+    started_at = time.perf_counter()
+    try:
+        result = subprocess.run([sys.executable, script_name], cwd=SCRIPTS_DIR,
+                                capture_output=True, text=True, timeout=timeout)
+        # Keep the bundle free of machine-specific paths (warnings and tracebacks)
+        stderr = result.stderr.replace(SCRIPTS_DIR + os.sep, '')
+        returncode, stdout = result.returncode, result.stdout
+    except subprocess.TimeoutExpired:
+        returncode, stdout, stderr = None, '', f'Timed out after {timeout} s.'
+    return {
+        'success': probe_succeeded(script_name, returncode, stdout),
+        'returncode': returncode,
+        'output': stdout,
+        'error': stderr,
+        'values': extract_values(stdout),
+        'runtime_s': round(time.perf_counter() - started_at, 3),
+        'computed_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'input_hash': combined_hash(inputs),
+        'inputs': inputs,
+    }
+
+def load_bundle(path=BUNDLE_PATH):
+    try:
+        with open(path) as f:
+            bundle = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return bundle if bundle.get('schema_version') == SCHEMA_VERSION else None
+
+def stale_probes(path=BUNDLE_PATH):
+    """Probes whose bundle entry is missing or whose inputs changed since it was computed."""
+    bundle = load_bundle(path) or {'probes': {}}
+    return [name for name in PROBE_INPUTS
+            if bundle['probes'].get(name, {}).get('input_hash') != combined_hash(probe_inputs(name))]
+
+def build(force=False, workers=None, path=BUNDLE_PATH):
+    """Recomputes stale probes and writes the bundle. Returns (bundle, recomputed names)."""
+    previous = load_bundle(path) or {'bundle_version': 0, 'probes': {}}
+    probes = {}
+    stale = []
+    for script_name in PROBE_INPUTS:
+        entry = previous['probes'].get(script_name)
+        if not force and entry and entry['input_hash'] == combined_hash(probe_inputs(script_name)):
+            probes[script_name] = entry
+        else:
+            stale.append(script_name)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for script_name, entry in zip(stale, pool.map(run_probe, stale)):
+            probes[script_name] = entry
+
+    changed = bool(stale) or set(previous['probes']) != set(probes)
+    bundle = {
+        'schema_version': SCHEMA_VERSION,
+        'bundle_version': previous['bundle_version'] + (1 if changed else 0),
+        'generated_at': (datetime.now(timezone.utc).isoformat(timespec='seconds')
+                         if changed else previous.get('generated_at')),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': _package_version('numpy'),
+            'scipy': _package_version('scipy'),
+            'pandas': _package_version('pandas'),
+        },
+        'parameters': {'H0': 73.24, 'Om': 0.2974, 'Gamma': 0.433, 'A1': 0.031, 'A2': 0.019},
+        'probes': {name: probes[name] for name in PROBE_INPUTS},
+    }
+    if changed:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(bundle, f, indent=2, sort_keys=False)
+            f.write('\n')
+    return bundle, stale
+
+def _package_version(name):
+    try:
+        return __import__(name).__version__
+    except ImportError:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the precomputed results bundle.")
+    parser.add_argument("--force", action="store_true", help="Recompute every probe.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of probes run in parallel.")
+    parser.add_argument("--output", default=BUNDLE_PATH, help="Path of the JSON bundle.")
+    parser.add_argument("--check", action="store_true",
+                        help="Only check that the bundle is up to date; exit with status 1 if it is not.")
+    args = parser.parse_args()
+
+    if args.check:
+        stale = stale_probes(args.output)
+        for name in stale:
+            print(f"-> {name:<26s} stale (inputs changed since the bundle was built)")
+        print(f"Bundle {args.output} is " + ("up to date." if not stale else
+                                              "out of date: run 'python scripts/build_results.py'."))
+        sys.exit(1 if stale else 0)
+
+    print("--- Building the precomputed results bundle ---")
+    started_at = time.perf_counter()
+    bundle, recomputed = build(force=args.force, workers=args.workers, path=args.output)
+    for name, entry in bundle['probes'].items():
+        status = 'recomputed' if name in recomputed else 'up to date'
+        if entry['success']:
+            result = 'ok'
+        elif entry['returncode'] == 0:
+            result = 'FAILED (no result)'
+        else:
+            result = f"FAILED (exit {entry['returncode']})"
+        print(f"-> {name:<26s} {status:<11s} {result:<16s} {entry['runtime_s']:8.2f} s")
+    print("-" * 45)
+    print(f"Bundle version {bundle['bundle_version']} written to {args.output}"
+          if recomputed else f"Bundle version {bundle['bundle_version']} is up to date.")
+    print(f"Build time: {time.perf_counter() - started_at:.2f} s")
@@ -0,0 +1,378 @@
+import numpy as np
+import platform
+import scipy
+import os
+import json
+import time
+import argparse
+import model_registry as registry
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Chain Store and Convergence Diagnostics (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# Append-only, chunked on-disk storage for MCMC chains of a registered model,
+# with convergence diagnostics updated chunk by chunk.
+#
+# A store is a directory:
+#
+#   manifest.json        schema (model, parameter names), n_chains and the
+#                        ordered list of chunks; rewritten atomically after
+#                        every chunk, so an interrupted run stays readable
+#   chunk_000000.npz     compressed samples (n_chains, n_steps, n_params) and
+#   chunk_000001.npz     log-probabilities (n_chains, n_steps)
+#   ...
+#
+# ChainWriter buffers at most one chunk in memory; opening an existing store
+# resumes it. StreamingDiagnostics keeps only running sums: per-chain Welford
+# means and variances (Gelman-Rubin R-hat), batch means with doubling batch
+# size (integrated autocorrelation time and effective sample size) and a
+# reservoir sample (marginal quantiles), so memory does not grow with the run.
+#
+# Usage:
+#   python chain_store.py sample chains/ --chains 16 --probes cosmic_chronometers bao
+#   python chain_store.py summary chains/ --burn-in 5000
+# ==============================================================================
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+QUANTILES = (2.5, 16.0, 50.0, 84.0, 97.5)
+
+# --- Storage ---
+class ChainWriter:
+    """Streams samples of n_chains parallel chains into a chunked store."""
+
+    def __init__(self, path, n_chains, model="fractal", chunk_steps=1000, metadata=None, diagnostics=None):
+        self.path = path
+        self.chunk_steps = chunk_steps
+        self.diagnostics = diagnostics
+        manifest_path = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest_path):
+            self.manifest = read_manifest(path)
+            if self.manifest["model"] != model or self.manifest["n_chains"] != n_chains:
+                raise ValueError(f"{path} holds {self.manifest['n_chains']} chains of '{self.manifest['model']}', "
+                                 f"cannot append {n_chains} chains of '{model}'.")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.manifest = {
+                "format_version": FORMAT_VERSION, "model": model,
+                "parameters": registry.parameter_names(model), "n_chains": n_chains,
+                "n_steps": 0, "metadata": metadata or {}, "chunks": [],
+            }
+            self._write_manifest()
+        self.n_params = len(self.manifest["parameters"])
+        self._samples, self._log_prob, self._buffered = [], [], 0
+
+    @property
+    def n_steps(self):
+        """Steps stored on disk plus steps still buffered."""
+        return self.manifest["n_steps"] + self._buffered
+
+    def append(self, samples, log_prob=None):
+        """
+        Adds steps for every chain: samples of shape (n_chains, n_params) for
+        one step or (n_chains, n_steps, n_params) for several.
+        """
+        samples = np.asarray(samples, dtype=float)
+        if samples.ndim == 2:
+            samples = samples[:, None, :]
+        if samples.shape[0] != self.manifest["n_chains"] or samples.shape[2] != self.n_params:
+            raise ValueError(f"Expected samples of shape ({self.manifest['n_chains']}, n_steps, {self.n_params}), "
+                             f"got {samples.shape}.")
+        if log_prob is None:
+            log_prob = np.full(samples.shape[:2], np.nan)
+        self._samples.append(samples)
+        self._log_prob.append(np.asarray(log_prob, dtype=float).reshape(samples.shape[:2]))
+        self._buffered += samples.shape[1]
+        while self._buffered >= self.chunk_steps:
+            self._flush(self.chunk_steps)
+
+    def flush(self):
+        """Writes the buffered steps (if any) as a chunk."""
+        if self._buffered:
+            self._flush(self._buffered)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _flush(self, n_steps):
+        samples = np.concatenate(self._samples, axis=1)
+        log_prob = np.concatenate(self._log_prob, axis=1)
+        name = f"chunk_{len(self.manifest['chunks']):06d}.npz"
+        np.savez_compressed(os.path.join(self.path, name),
+                            samples=samples[:, :n_steps], log_prob=log_prob[:, :n_steps])
+        self.manifest["chunks"].append({"file": name, "first_step": self.manifest["n_steps"], "n_steps": n_steps})
+        self.manifest["n_steps"] += n_steps
+        self._write_manifest()
+        if self.diagnostics is not None:
+            self.diagnostics.update(samples[:, :n_steps])
+        self._samples, self._log_prob = [samples[:, n_steps:]], [log_prob[:, n_steps:]]
+        self._buffered -= n_steps
+
+    def _write_manifest(self):
+        tmp_path = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST))
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported chain store format version {manifest.get('format_version')}.")
+    return manifest
+
+def iter_chunks(path):
+    """Yields (samples, log_prob) chunk by chunk, in order."""
+    for chunk in read_manifest(path)["chunks"]:
+        with np.load(os.path.join(path, chunk["file"])) as data:
+            yield data["samples"], data["log_prob"]
+
+def load_chains(path, burn_in=0, thin=1):
+    """Whole chains in memory, shape (n_chains, n_steps, n_params); for short runs and plotting."""
+    samples = np.concatenate([s for s, _ in iter_chunks(path)], axis=1)
+    return samples[:, burn_in::thin]
+
+# --- Streaming diagnostics ---
+class StreamingDiagnostics:
+    """Convergence diagnostics updated from chunks of shape (n_chains, n_steps, n_params)."""
+
+    def __init__(self, n_chains, parameter_names, burn_in=0, max_batches=64, reservoir_size=20000, seed=0):
+        self.names = list(parameter_names)
+        self.n_chains = n_chains
+        self.burn_in = burn_in
+        n_params = len(self.names)
+        self.skipped = 0
+        self.n = 0
+        # Per-chain running means and sums of squared deviations (Welford)
+        self.mean = np.zeros((n_chains, n_params))
+        self.m2 = np.zeros((n_chains, n_params))
+        # Batch means: completed batch sums and the batch being filled
+        self.max_batches = max_batches
+        self.batch_size = 1
+        self.batch_sums = []
+        self.partial = np.zeros((n_chains, n_params))
+        self.partial_n = 0
+        # Reservoir sample of the pooled chains (Algorithm R)
+        self.reservoir = np.empty((reservoir_size, n_params))
+        self.n_pooled = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=float)
+        skip = min(max(self.burn_in - self.skipped, 0), chunk.shape[1])
+        self.skipped += skip
+        chunk = chunk[:, skip:]
+        if chunk.shape[1] == 0:
+            return
+        self._update_moments(chunk)
+        self._update_batches(chunk)
+        self._update_reservoir(chunk)
+        self.n += chunk.shape[1]
+
+    def _update_moments(self, chunk):
+        m = chunk.shape[1]
+        chunk_mean = chunk.mean(axis=1)
+        chunk_m2 = np.sum((chunk - chunk_mean[:, None, :])**2, axis=1)
+        delta = chunk_mean - self.mean
+        total = self.n + m
+        self.mean += delta * m / total
+        self.m2 += chunk_m2 + delta**2 * self.n * m / total
+
+    def _update_batches(self, chunk):
+        position, m = 0, chunk.shape[1]
+        while position < m:
+            take = min(self.batch_size - self.partial_n, m - position)
+            self.partial += chunk[:, position:position + take].sum(axis=1)
+            self.partial_n += take
+            position += take
+            if self.partial_n == self.batch_size:
+                self.batch_sums.append(self.partial)
+                self.partial, self.partial_n = np.zeros_like(self.partial), 0
+                if len(self.batch_sums) == 2 * self.max_batches:
+                    # Merge neighbouring batches: half as many, twice as long
+                    self.batch_sums = [a + b for a, b in zip(self.batch_sums[::2], self.batch_sums[1::2])]
+                    self.batch_size *= 2
+
+    def _update_reservoir(self, chunk):
+        items = chunk.transpose(1, 0, 2).reshape(-1, chunk.shape[2])
+        k = len(self.reservoir)
+        fill = min(max(k - self.n_pooled, 0), len(items))
+        self.reservoir[self.n_pooled:self.n_pooled + fill] = items[:fill]
+        rest = items[fill:]
+        if len(rest):
+            seen = self.n_pooled + fill + np.arange(len(rest))
+            slots = self.rng.integers(0, seen + 1)
+            keep = slots < k
+            # Repeated slots keep the later item, as in the sequential algorithm
+            self.reservoir[slots[keep]] = rest[keep]
+        self.n_pooled += len(items)
+
+    # --- Results ---
+    def r_hat(self):
+        """Gelman-Rubin potential scale reduction factor per parameter."""
+        if self.n < 2 or self.n_chains < 2:
+            return np.full(len(self.names), np.nan)
+        within = np.mean(self.m2 / (self.n - 1), axis=0)
+        between_over_n = np.var(self.mean, axis=0, ddof=1)
+        pooled = (self.n - 1) / self.n * within + between_over_n
+        return np.sqrt(pooled / within)
+
+    def autocorrelation_time(self):
+        """Integrated autocorrelation time per parameter (batch-means estimate)."""
+        if len(self.batch_sums) < 2 or self.n < 2:
+            return np.full(len(self.names), np.nan)
+        batch_means = np.array(self.batch_sums) / self.batch_size      # (n_batches, n_chains, n_params)
+        batch_variance = np.mean(np.var(batch_means, axis=0, ddof=1), axis=0)
+        sample_variance = np.mean(self.m2 / (self.n - 1), axis=0)
+        return self.batch_size * batch_variance / sample_variance
+
+    def effective_sample_size(self):
+        return self.n_chains * self.n / self.autocorrelation_time()
+
+    def quantiles(self, q=QUANTILES):
+        """Marginal quantiles per parameter from the reservoir, shape (len(q), n_params)."""
+        filled = self.reservoir[:min(self.n_pooled, len(self.reservoir))]
+        return np.percentile(filled, q, axis=0) if len(filled) else np.full((len(q), len(self.names)), np.nan)
+
+    def summary(self):
+        r_hat, tau, ess = self.r_hat(), self.autocorrelation_time(), self.effective_sample_size()
+        quantiles = self.quantiles()
+        n_total = self.n_chains * self.n
+        std = np.sqrt(np.sum(self.m2 + self.n * (self.mean - self.mean.mean(axis=0))**2, axis=0) / max(n_total - 1, 1))
+        return {name: {"mean": self.mean[:, i].mean(), "std": std[i], "r_hat": r_hat[i], "tau": tau[i],
+                       "ess": ess[i], "quantiles": dict(zip(QUANTILES, quantiles[:, i]))}
+                for i, name in enumerate(self.names)}
+
+    def converged(self, max_r_hat=1.01, min_ess=1000, min_tau_multiple=50):
+        """
+        True when every parameter has R-hat below max_r_hat, at least min_ess
+        effective samples, and chains longer than min_tau_multiple
+        autocorrelation times (so that tau itself is trustworthy).
+        """
+        r_hat, tau, ess = self.r_hat(), self.autocorrelation_time(), self.effective_sample_size()
+        if np.any(~np.isfinite(r_hat)) or np.any(~np.isfinite(tau)):
+            return False
+        return bool(np.all(r_hat < max_r_hat) and np.all(ess > min_ess) and np.all(self.n > min_tau_multiple * tau))
+
+def diagnose(path, burn_in=0, **kwargs):
+    """Streams an existing store through StreamingDiagnostics."""
+    manifest = read_manifest(path)
+    diagnostics = StreamingDiagnostics(manifest["n_chains"], manifest["parameters"], burn_in=burn_in, **kwargs)
+    for samples, _ in iter_chunks(path):
+        diagnostics.update(samples)
+    return diagnostics
+
+def format_summary(diagnostics):
+    lines = [f"   {'param':<8s}{'mean':>11s}{'std':>11s}{'2.5%':>11s}{'50%':>11s}{'97.5%':>11s}"
+             f"{'R-hat':>9s}{'tau':>9s}{'ESS':>10s}"]
+    for name, s in diagnostics.summary().items():
+        q = s["quantiles"]
+        lines.append(f"   {name:<8s}{s['mean']:11.5f}{s['std']:11.5f}{q[2.5]:11.5f}{q[50.0]:11.5f}{q[97.5]:11.5f}"
+                     f"{s['r_hat']:9.4f}{s['tau']:9.1f}{s['ess']:10.0f}")
+    return "\n".join(lines)
+
+# --- Sampler (vectorized random-walk Metropolis over the chains) ---
+def sample(path, model, probe_names, n_chains=16, chunk_steps=1000, burn_in=5000, max_steps=200000,
+           max_r_hat=1.01, min_ess=1000, seed=42):
+    """
+    Runs n_chains Metropolis chains on the Chi^2 of the selected probes with
+    flat priors on the registry box, streaming into the store at path until
+    the diagnostics report convergence or max_steps is reached. The diagonal
+    proposal is tuned from the chain spread during burn-in only.
+    """
+    import probes
+
+    rng = np.random.default_rng(seed)
+    lower, upper = registry.parameter_bounds(model)
+
+    def log_prob(params):
+        inside = np.all((params >= lower) & (params <= upper), axis=1)
+        result = np.full(params.shape[0], -np.inf)
+        if inside.any():
+            with np.errstate(all='ignore'):
+                chi2 = sum(probes.evaluate(model, params[inside], probe_names).values())
+            result[inside] = np.where(np.isfinite(chi2), -0.5 * chi2, -np.inf)
+        return result
+
+    scale = 1e-3 * (upper - lower)
+    current = registry.default_parameters(model) + scale * rng.standard_normal((n_chains, len(lower)))
+    current = np.clip(current, lower, upper)
+    current_lp = log_prob(current)
+
+    diagnostics = StreamingDiagnostics(n_chains, registry.parameter_names(model), burn_in=burn_in, seed=seed)
+    writer = ChainWriter(path, n_chains, model, chunk_steps,
+                         metadata={"probes": probe_names, "burn_in": burn_in, "seed": seed}, diagnostics=diagnostics)
+    if writer.n_steps:
+        raise ValueError(f"{path} already holds a run; sample() starts fresh chains.")
+    block = np.empty((n_chains, chunk_steps, len(lower)))
+    block_lp = np.empty((n_chains, chunk_steps))
+    accepted = 0
+    with writer:
+        while writer.n_steps < max_steps:
+            for step in range(chunk_steps):
+                proposal = current + scale * rng.standard_normal(current.shape)
+                proposal_lp = log_prob(proposal)
+                accept = np.log(rng.random(n_chains)) < proposal_lp - current_lp
+                current[accept], current_lp[accept] = proposal[accept], proposal_lp[accept]
+                block[:, step], block_lp[:, step] = current, current_lp
+                accepted += accept.sum()
+            if writer.n_steps + chunk_steps <= burn_in:
+                # Optimal random-walk scale for a Gaussian target
+                spread = block.reshape(-1, len(lower)).std(axis=0)
+                scale = np.where(spread > 0, 2.38 / np.sqrt(len(lower)) * spread, scale)
+            writer.append(block, block_lp)
+            if diagnostics.converged(max_r_hat, min_ess):
+                break
+    return diagnostics, accepted / (n_chains * writer.n_steps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked chain store with streaming convergence diagnostics.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sample_parser = sub.add_parser("sample", help="Run Metropolis chains into a new store until convergence.")
+    sample_parser.add_argument("store", help="Store directory.")
+    sample_parser.add_argument("--model", default="fractal", choices=list(registry.MODELS))
+    sample_parser.add_argument("--probes", nargs="+", default=["cosmic_chronometers", "bao"])
+    sample_parser.add_argument("--chains", type=int, default=16)
+    sample_parser.add_argument("--chunk-steps", type=int, default=1000)
+    sample_parser.add_argument("--burn-in", type=int, default=5000)
+    sample_parser.add_argument("--max-steps", type=int, default=200000)
+    sample_parser.add_argument("--max-r-hat", type=float, default=1.01)
+    sample_parser.add_argument("--min-ess", type=float, default=1000)
+    sample_parser.add_argument("--seed", type=int, default=42)
+    summary_parser = sub.add_parser("summary", help="Stream an existing store through the diagnostics.")
+    summary_parser.add_argument("store", help="Store directory.")
+    summary_parser.add_argument("--burn-in", type=int, default=0)
+    args = parser.parse_args()
+
+    # --- Diagnostic ---
+    print("### Execution Environment Diagnostic ###")
+    print(f"Python Version: {platform.python_version()}")
+    print(f"NumPy Version: {np.__version__}")
+    print(f"SciPy Version: {scipy.__version__}")
+    print("-" * 38 + "\n")
+
+    started_at = time.perf_counter()
+    if args.command == "sample":
+        print(f"--- Sampling '{args.model}' on {', '.join(args.probes)} ---")
+        diagnostics, acceptance = sample(args.store, args.model, args.probes, args.chains, args.chunk_steps,
+                                         args.burn_in, args.max_steps, args.max_r_hat, args.min_ess, args.seed)
+        status = "converged" if diagnostics.converged(args.max_r_hat, args.min_ess) else "NOT converged (max steps)"
+        print(f"-> {args.chains} chains x {args.burn_in + diagnostics.n} steps, acceptance {acceptance:.2f}, "
+              f"{status}, {time.perf_counter() - started_at:.1f} s")
+    else:
+        manifest = read_manifest(args.store)
+        print(f"--- Chain store {args.store}: '{manifest['model']}', {manifest['n_chains']} chains x "
+              f"{manifest['n_steps']} steps in {len(manifest['chunks'])} chunks ---")
+        diagnostics = diagnose(args.store, burn_in=args.burn_in)
+        print(f"-> Streamed in {time.perf_counter() - started_at:.2f} s, converged: {diagnostics.converged()}")
+    print(format_summary(diagnostics))
@@ -0,0 +1,129 @@
+import numpy as np
+import platform
+import scipy
+import argparse
+from scipy.optimize import minimize
+import model_registry as registry
+import probes
+from derived_cache import DERIVED_CACHE
+from emulator import use_emulator
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Model Comparison Script (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# This script scores every registered model (fractal, flat LambdaCDM and the
+# fractal variants) on every probe through the batched registry interface and
+# reports Chi^2, delta-Chi^2, AIC and BIC side by side.
+#
+# Usage:
+#   python compare_models.py                      # published parameters
+#   python compare_models.py --fit                # best fit of each model
+#   python compare_models.py --models fractal lcdm --probes bao cosmic_chronometers
+#   python compare_models.py --emulator fractal_emulator.npz
+# ==============================================================================
+
+def total_chi2(model_name, params, probe_names):
+    """Sum of the probe Chi^2 values, shape (n_sets,)."""
+    return sum(probes.evaluate(model_name, params, probe_names).values())
+
+def fit_model(model_name, probe_names, n_search=4096, seed=42):
+    """
+    Best-fit parameters of a model: one batched evaluation of n_search points
+    drawn in the prior box (plus the published values), then a Nelder-Mead
+    refinement from the best point.
+    """
+    lower, upper = registry.parameter_bounds(model_name)
+    rng = np.random.default_rng(seed)
+    candidates = lower + (upper - lower) * rng.random((n_search, len(lower)))
+    candidates = np.vstack((registry.default_parameters(model_name), candidates))
+    with np.errstate(all='ignore'):
+        chi2 = total_chi2(model_name, candidates, probe_names)
+    start = candidates[np.nanargmin(np.where(np.isfinite(chi2), chi2, np.nan))]
+
+    def objective(x):
+        if np.any(x < lower) or np.any(x > upper):
+            return np.inf
+        with np.errstate(all='ignore'):
+            value = total_chi2(model_name, x, probe_names)[0]
+        return value if np.isfinite(value) else np.inf
+
+    result = minimize(objective, start, method='Nelder-Mead',
+                      options={'maxiter': 4000, 'xatol': 1e-6, 'fatol': 1e-6})
+    return result.x
+
+def compare(model_names, probe_names, fit=False):
+    """Returns one row per model with per-probe Chi^2, totals, AIC and BIC."""
+    n_total = sum(probes.n_data(probe) for probe in probe_names)
+    rows = []
+    for name in model_names:
+        params = fit_model(name, probe_names) if fit else registry.default_parameters(name)
+        with np.errstate(all='ignore'):
+            chi2_by_probe = {probe: value[0] for probe, value in probes.evaluate(name, params, probe_names).items()}
+        chi2 = sum(chi2_by_probe.values())
+        k = len(params)
+        rows.append({
+            "model": name, "params": params, "k": k, "chi2_by_probe": chi2_by_probe, "chi2": chi2,
+            "aic": chi2 + 2 * k, "bic": chi2 + k * np.log(n_total), "n": n_total,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Side-by-side comparison of the registered models.")
+    parser.add_argument("--models", nargs="+", default=list(registry.MODELS), choices=list(registry.MODELS))
+    parser.add_argument("--probes", nargs="+", default=list(probes.PROBES), choices=list(probes.PROBES))
+    parser.add_argument("--reference", default="lcdm", help="Model used as reference for the deltas.")
+    parser.add_argument("--fit", action="store_true", help="Fit each model before comparing.")
+    parser.add_argument("--emulator", metavar="PATH", help="Trained distance emulator (see emulator.py) for the fractal model.")
+    args = parser.parse_args()
+
+    # --- Diagnostic ---
+    print("### Execution Environment Diagnostic ###")
+    print(f"Python Version: {platform.python_version()}")
+    print(f"NumPy Version: {np.__version__}")
+    print(f"SciPy Version: {scipy.__version__}")
+    print("-" * 38 + "\n")
+
+    print("--- Script for Model Comparison across all probes ---")
+    if args.emulator:
+        emulator = use_emulator(args.emulator)
+        print(f"-> Fractal distances from the emulator {args.emulator} (z <= {emulator.z_max:g} inside its box).")
+    print("\n[STEP 1] Registered models and probes.")
+    for name in args.models:
+        model = registry.get_model(name)
+        print(f"-> {name}: {model['description']} [{', '.join(registry.parameter_names(name))}]")
+    for probe in args.probes:
+        print(f"-> {probe}: {probes.PROBES[probe]['description']} ({probes.n_data(probe)} points)")
+    if "snia" in args.probes:
+        print(f"-> SNIa covariance: {probes.load_snia()['covariance']}")
+
+    label = "best-fit" if args.fit else "published"
+    print(f"\n[STEP 2] Evaluating every model on every probe at its {label} parameters.")
+    rows = compare(args.models, args.probes, fit=args.fit)
+    for row in rows:
+        values = ", ".join(f"{key}={value:.4g}" for key, value in zip(registry.parameter_names(row["model"]), row["params"]))
+        print(f"-> {row['model']}: {values}")
+
+    print("\n[STEP 3] Chi^2 per probe.")
+    width = max(len(name) for name in args.models) + 2
+    print(" " * width + "".join(f"{probe:>22s}" for probe in args.probes))
+    for row in rows:
+        print(f"{row['model']:<{width}s}" + "".join(f"{row['chi2_by_probe'][probe]:22.3f}" for probe in args.probes))
+
+    print("\n[STEP 4] Information criteria.")
+    reference = next((row for row in rows if row["model"] == args.reference), rows[0])
+    print("-" * (width + 76))
+    print(f"{'model':<{width}s}{'k':>4s}{'Chi^2':>16s}{'dChi^2':>14s}{'AIC':>14s}{'dAIC':>14s}{'BIC':>14s}{'dBIC':>14s}")
+    for row in rows:
+        print(f"{row['model']:<{width}s}{row['k']:>4d}{row['chi2']:16.3f}{row['chi2'] - reference['chi2']:14.3f}"
+              f"{row['aic']:14.3f}{row['aic'] - reference['aic']:14.3f}"
+              f"{row['bic']:14.3f}{row['bic'] - reference['bic']:14.3f}")
+    print("-" * (width + 76))
+    print(f"Deltas are relative to '{reference['model']}' (negative favours the model). N = {reference['n']} data points.")
+
+    stats = DERIVED_CACHE.stats()
+    print(f"\nDerived-quantity cache: {stats['hits']} hits, {stats['misses']} misses "
+          f"(hit rate {stats['hit_rate']:.1%}), {stats['entries']} entries, {stats['evictions']} evictions.")
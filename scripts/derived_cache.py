@@ -0,0 +1,97 @@
+import numpy as np
+from collections import OrderedDict
+import model_registry as registry
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Derived Quantities Cache (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# Quantities that depend only on the parameter vector (rd, D_M at
+# recombination, theta*) are computed once per parameter point and kept in a
+# bounded LRU cache keyed on (model, rounded parameter tuple). Samplers, grid
+# scans and fits that revisit a point reuse the stored values for free.
+#
+#   values = derived_quantities("fractal", params)   # dict of (n_sets,) arrays
+#   print(DERIVED_CACHE.stats())
+# ==============================================================================
+
+Z_RECOMBINATION = 1090.0
+QUANTITIES = ("rd", "dm_recombination", "theta_star")
+
+class DerivedCache:
+    """Bounded LRU cache of per-parameter-point derived quantities with hit/miss counters."""
+
+    def __init__(self, max_entries=100000, decimals=10):
+        self.max_entries = max_entries
+        self.decimals = decimals
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, model_name, row):
+        return (model_name,) + tuple(np.round(row, self.decimals).tolist())
+
+    def get(self, key):
+        values = self._entries.get(key)
+        if values is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return values
+
+    def put(self, key, values):
+        self._entries[key] = values
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries), "max_entries": self.max_entries,
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+DERIVED_CACHE = DerivedCache()
+
+def _compute(model_name, params):
+    """Computes all derived quantities for a batch of parameter sets."""
+    rd = registry.sound_horizon(model_name, params)
+    dm = registry.comoving_distance(model_name, [Z_RECOMBINATION], params)[:, 0]
+    return {"rd": rd, "dm_recombination": dm, "theta_star": rd / dm}
+
+def derived_quantities(model_name, params, cache=None):
+    """
+    Returns {quantity: array of shape (n_sets,)} for every name in QUANTITIES.
+    Only the parameter sets missing from the cache are computed, in one
+    batched call; repeated rows within the batch are computed once.
+    """
+    cache = cache or DERIVED_CACHE
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    keys = [cache.key(model_name, row) for row in params]
+    found = [cache.get(key) for key in keys]
+
+    missing = {}
+    for i, (key, values) in enumerate(zip(keys, found)):
+        if values is None:
+            missing.setdefault(key, i)
+    if missing:
+        rows = list(missing.values())
+        computed = _compute(model_name, params[rows])
+        new_values = {}
+        for j, key in enumerate(missing):
+            new_values[key] = {name: computed[name][j] for name in QUANTITIES}
+            cache.put(key, new_values[key])
+        found = [values if values is not None else new_values[key] for key, values in zip(keys, found)]
+
+    return {name: np.array([values[name] for values in found]) for name in QUANTITIES}
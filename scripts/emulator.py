@@ -0,0 +1,239 @@
+import numpy as np
+import platform
+import scipy
+import time
+import argparse
+from scipy.integrate import quad
+import model_registry as registry
+from derived_cache import DERIVED_CACHE
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Distance Emulator (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# This module trains a Chebyshev surrogate of the comoving distance
+# D_C(z; H0, Om, Gamma, A1, A2) of the fractal model over a user-defined
+# prior box, using the registry's H(z) as ground truth. D_C scales exactly as
+# 1/H0, so the surrogate is a tensor Chebyshev series of
+#
+#   H0 * D_C(z) / ln(1 + z)   in (Om, Gamma, A1, A2, ln(1 + z))
+#
+# and H0 is applied analytically. The trained coefficients are stored with
+# np.savez, and use_emulator() makes every probe read its distances from the
+# surrogate (points outside the box still use the exact integration).
+#
+# Usage:
+#   python emulator.py train fractal_emulator.npz --box Om=0.25:0.35 --z-max 2.5
+#   python emulator.py report fractal_emulator.npz
+# ==============================================================================
+
+MODEL = "fractal"
+FORMAT_VERSION = 1
+
+# Box and degrees used when nothing else is requested (around the GLOBAL fit)
+DEFAULT_BOX = {"H0": (65.0, 80.0), "Om": (0.25, 0.35), "Gamma": (0.2, 0.7), "A1": (-0.1, 0.1), "A2": (-0.1, 0.1)}
+DEFAULT_DEGREES = {"Om": 8, "Gamma": 8, "A1": 4, "A2": 4}
+DEFAULT_Z_DEGREE = 32
+
+def chebyshev_nodes(n):
+    """Chebyshev points of the first kind on [-1, 1]."""
+    return np.cos(np.pi * (np.arange(n) + 0.5) / n)[::-1]
+
+def _to_unit(x, lower, upper):
+    return 2.0 * (np.asarray(x) - lower) / (upper - lower) - 1.0
+
+def _from_unit(u, lower, upper):
+    return lower + 0.5 * (u + 1.0) * (upper - lower)
+
+def _apply_along(tensor, matrix, axis):
+    """Multiplies a tensor by a matrix along one axis."""
+    return np.moveaxis(np.tensordot(matrix, tensor, axes=(1, axis)), 0, axis)
+
+
+class DistanceEmulator:
+    """Chebyshev surrogate of the fractal model's comoving distance over a parameter box."""
+
+    def __init__(self, coefficients, box, z_max):
+        self.coefficients = coefficients
+        self.box = {name: tuple(bounds) for name, bounds in box.items()}
+        self.z_max = float(z_max)
+        self.names = registry.parameter_names(MODEL)
+        self.shape_names = self.names[1:]   # H0 is handled analytically
+        self._lower = np.array([self.box[name][0] for name in self.names])
+        self._upper = np.array([self.box[name][1] for name in self.names])
+        self._x_max = np.log1p(self.z_max)
+
+    # --- Training ---
+    @classmethod
+    def train(cls, box=None, z_max=2.5, degrees=None, z_degree=DEFAULT_Z_DEGREE):
+        box = {**DEFAULT_BOX, **(box or {})}
+        degrees = {**DEFAULT_DEGREES, **(degrees or {})}
+        names = registry.parameter_names(MODEL)
+        shape_names = names[1:]
+
+        nodes = [chebyshev_nodes(degrees[name] + 1) for name in shape_names]
+        z_unit = chebyshev_nodes(z_degree + 1)
+        x_nodes = _from_unit(z_unit, 0.0, np.log1p(z_max))
+        z_nodes = np.expm1(x_nodes)
+
+        # Ground truth on the tensor grid (H0 = 1, so D_C * H0 is what we emulate),
+        # always from the exact integration even if an emulator is active
+        grids = np.meshgrid(*[_from_unit(u, *box[name]) for u, name in zip(nodes, shape_names)], indexing="ij")
+        params = np.column_stack([np.ones(grids[0].size)] + [g.ravel() for g in grids])
+        values = np.empty((params.shape[0], len(z_nodes)))
+        for start in range(0, params.shape[0], 2048):
+            stop = start + 2048
+            values[start:stop] = registry.integrate_comoving_distance(MODEL, z_nodes, params[start:stop]) / x_nodes
+        values = values.reshape([len(u) for u in nodes] + [len(z_nodes)])
+
+        # Values at the nodes -> Chebyshev coefficients, one axis at a time
+        for axis, u in enumerate(nodes + [z_unit]):
+            inverse = np.linalg.inv(np.polynomial.chebyshev.chebvander(u, len(u) - 1))
+            values = _apply_along(values, inverse, axis)
+        return cls(values, box, z_max)
+
+    # --- Storage ---
+    def save(self, path):
+        np.savez(path, format_version=FORMAT_VERSION, model=MODEL, coefficients=self.coefficients,
+                 names=np.array(self.names), lower=self._lower, upper=self._upper, z_max=self.z_max)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported emulator format version {int(data['format_version'])}.")
+            box = {str(name): (lo, hi) for name, lo, hi in zip(data["names"], data["lower"], data["upper"])}
+            return cls(data["coefficients"], box, float(data["z_max"]))
+
+    # --- Evaluation ---
+    def in_box(self, z, params):
+        """Boolean mask of the parameter sets inside the box (all z must be covered)."""
+        params = np.atleast_2d(np.asarray(params, dtype=float))
+        if np.max(z, initial=0.0) > self.z_max or np.min(z, initial=0.0) < 0.0:
+            return np.zeros(params.shape[0], dtype=bool)
+        return np.all((params >= self._lower) & (params <= self._upper), axis=1)
+
+    def comoving_distance(self, z, params):
+        """D_C(z) in Mpc, shape (n_sets, n_z); params must lie inside the box."""
+        z = np.atleast_1d(np.asarray(z, dtype=float))
+        params = np.atleast_2d(np.asarray(params, dtype=float))
+        unit = np.clip(_to_unit(params, self._lower, self._upper), -1.0, 1.0)
+        n_sets = params.shape[0]
+
+        # Contract the parameter axes one at a time, leaving the (n_sets, z_degree + 1)
+        # coefficients of the series in ln(1 + z)
+        degree = self.coefficients.shape[0]
+        series = _chebyshev_basis(unit[:, 1], degree) @ self.coefficients.reshape(degree, -1)
+        for axis in range(1, len(self.shape_names)):
+            degree = self.coefficients.shape[axis]
+            T = _chebyshev_basis(unit[:, axis + 1], degree)
+            series = np.einsum("nk,nkr->nr", T, series.reshape(n_sets, degree, -1))
+        x = np.log1p(z)
+        Tz = _chebyshev_basis(_to_unit(x, 0.0, self._x_max), self.coefficients.shape[-1])
+        return (series @ Tz.T) * x[None, :] / params[:, :1]
+
+def _chebyshev_basis(u, n_terms):
+    """T_0(u) ... T_{n_terms - 1}(u) for u in [-1, 1], shape (len(u), n_terms)."""
+    return np.cos(np.arccos(np.clip(u, -1.0, 1.0))[:, None] * np.arange(n_terms)[None, :])
+
+# --- Probe switch ---
+def use_emulator(emulator):
+    """
+    Routes the fractal model's comoving distances (and everything built on
+    them: D_V, theta*, SNIa moduli) through the emulator. Pass None to go back
+    to the exact integration. The derived-quantity cache is cleared so no
+    value from the other backend is reused.
+    """
+    if isinstance(emulator, str):
+        emulator = DistanceEmulator.load(emulator)
+    registry.set_distance_emulator(MODEL, emulator)
+    DERIVED_CACHE.clear()
+    return emulator
+
+# --- Accuracy report ---
+def accuracy_report(emulator, n_points=200, n_z=20, seed=1):
+    """Compares the emulator against quad at random points of its box."""
+    rng = np.random.default_rng(seed)
+    params = emulator._lower + (emulator._upper - emulator._lower) * rng.random((n_points, len(emulator.names)))
+    z = np.sort(rng.uniform(0.01, emulator.z_max, n_z))
+
+    started_at = time.perf_counter()
+    reference = np.array([[quad(lambda zp: registry.c / registry.hubble_rate(MODEL, zp, p)[0, 0], 0, zi)[0]
+                           for zi in z] for p in params])
+    quad_time = (time.perf_counter() - started_at) / n_points
+
+    emulated = emulator.comoving_distance(z, params)
+    started_at = time.perf_counter()
+    n_repeat = 20
+    for _ in range(n_repeat):
+        emulator.comoving_distance(z, params)
+    emulator_time = (time.perf_counter() - started_at) / (n_repeat * n_points)
+
+    started_at = time.perf_counter()
+    for p in params[:20]:
+        emulator.comoving_distance(z, p)
+    single_time = (time.perf_counter() - started_at) / 20
+
+    relative = np.abs(emulated / reference - 1.0)
+    return {
+        "n_points": n_points, "n_z": n_z,
+        "max_rel_error": relative.max(), "rms_rel_error": np.sqrt(np.mean(relative**2)),
+        "p99_rel_error": np.percentile(relative, 99),
+        "quad_time_per_point": quad_time, "emulator_time_per_point": emulator_time,
+        "emulator_time_single_call": single_time,
+    }
+
+def _parse_box(items):
+    box = {}
+    for item in items or []:
+        name, bounds = item.split("=")
+        lower, upper = (float(v) for v in bounds.split(":"))
+        box[name] = (lower, upper)
+    return box
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chebyshev emulator of the fractal model's comoving distance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train_parser = sub.add_parser("train", help="Train an emulator and store it.")
+    train_parser.add_argument("output", help="Output .npz file.")
+    train_parser.add_argument("--box", nargs="*", metavar="NAME=LO:HI", help="Prior box (default around the GLOBAL fit).")
+    train_parser.add_argument("--z-max", type=float, default=2.5, help="Largest redshift covered.")
+    train_parser.add_argument("--degree", nargs="*", metavar="NAME=DEG", help="Chebyshev degree per shape parameter.")
+    train_parser.add_argument("--z-degree", type=int, default=DEFAULT_Z_DEGREE, help="Chebyshev degree in ln(1 + z).")
+    report_parser = sub.add_parser("report", help="Accuracy and speed report against quad.")
+    report_parser.add_argument("emulator", help="Trained .npz file.")
+    report_parser.add_argument("--points", type=int, default=200, help="Number of random parameter points.")
+    args = parser.parse_args()
+
+    # --- Diagnostic ---
+    print("### Execution Environment Diagnostic ###")
+    print(f"Python Version: {platform.python_version()}")
+    print(f"NumPy Version: {np.__version__}")
+    print(f"SciPy Version: {scipy.__version__}")
+    print("-" * 38 + "\n")
+
+    if args.command == "train":
+        degrees = {name: int(deg) for name, deg in (item.split("=") for item in args.degree or [])}
+        print("--- Training the distance emulator ---")
+        started_at = time.perf_counter()
+        emulator = DistanceEmulator.train(_parse_box(args.box), args.z_max, degrees, args.z_degree)
+        emulator.save(args.output)
+        print(f"-> Box: " + ", ".join(f"{name}=[{lo:g}, {hi:g}]" for name, (lo, hi) in emulator.box.items()))
+        print(f"-> z range: [0, {emulator.z_max:g}], coefficient tensor {emulator.coefficients.shape}")
+        print(f"-> Trained in {time.perf_counter() - started_at:.2f} s and saved to {args.output}")
+        path = args.output if args.output.endswith(".npz") else args.output + ".npz"
+    else:
+        path = args.emulator
+
+    print("\n--- Accuracy report against quad ---")
+    emulator = DistanceEmulator.load(path)
+    report = accuracy_report(emulator, n_points=getattr(args, "points", 200))
+    print(f"-> {report['n_points']} random parameter points x {report['n_z']} redshifts")
+    print(f"-> Relative error: max {report['max_rel_error']:.2e}, 99th percentile {report['p99_rel_error']:.2e}, "
+          f"rms {report['rms_rel_error']:.2e}")
+    print(f"-> quad:     {report['quad_time_per_point'] * 1e6:12.1f} us per parameter point")
+    print(f"-> emulator: {report['emulator_time_per_point'] * 1e6:12.1f} us per parameter point (batched), "
+          f"{report['emulator_time_single_call'] * 1e6:.1f} us per single call")
@@ -0,0 +1,305 @@
+import numpy as np
+import pandas as pd
+import platform
+import scipy
+import sys
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial import cKDTree
+from scipy.integrate import cumulative_trapezoid
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Galaxy 2PCF Landy-Szalay Estimator (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# This script measures the galaxy two-point correlation function xi(r, z) from
+# a local galaxy catalog and a matching random catalog with the Landy-Szalay
+# estimator, and fits the measurement against the model's power law with the
+# evolving slope gamma(z).
+#
+# Pair counts use KD-trees (dual-tree counting, no O(N^2) loop) and are spread
+# over all available cores, so catalogs of a few million objects fit on one node.
+#
+# Usage:
+#   python galaxy_2pcf_estimator.py galaxies.csv randoms.csv
+#   python galaxy_2pcf_estimator.py --synthetic 200000
+#
+# Catalogs are CSV or whitespace-separated files with RA, DEC (degrees) and Z
+# columns (column names are case-insensitive).
+# ==============================================================================
+
+# --- 1. Model Definitions ---
+def phi_z(z, Gamma, A1, A2):
+    """Calculates the dynamic fractal dimension phi(z)."""
+    phi_inf = 1.618  # Updated to Golden Ratio
+    phi_0 = 2.85
+    base = phi_inf + (phi_0 - phi_inf) * np.exp(-Gamma * z)
+    bao_correction1 = A1 * np.exp(-0.5 * ((z - 0.4)/0.3)**2)
+    bao_correction2 = A2 * np.exp(-0.5 * ((z - 1.5)/0.4)**2)
+    return base + bao_correction1 + bao_correction2
+
+def H_model(z, H0, Om, Gamma, A1, A2):
+    """Calculates the theoretical H(z) from the dynamic fractal model."""
+    OL = 1.0 - Om
+    phi = phi_z(z, Gamma, A1, A2)
+    term1 = Om * (1.0 + z)**(3.0 * phi)
+    term2 = OL * (1.0 + z)**(3.0 * (2.0 - phi))
+    return H0 * np.sqrt(term1 + term2)
+
+def gamma_z(z):
+    """Calculates the theoretical correlation slope gamma(z) (see galaxy_2pcf_check.py)."""
+    gamma_inf = 0.55
+    gamma_0 = 1.25
+    k = 1.1
+    return gamma_inf + (gamma_0 - gamma_inf) * np.exp(-k * z)
+
+c = 299792.458
+
+def comoving_distance_table(z_max, model_args, n_grid=20001):
+    """Tabulates D_C(z) on a fine grid with one cumulative integration."""
+    z_grid = np.linspace(0.0, z_max, n_grid)
+    integrand = c / H_model(z_grid, *model_args)
+    return z_grid, cumulative_trapezoid(integrand, z_grid, initial=0.0)
+
+def to_cartesian(ra, dec, z, z_grid, dc_grid):
+    """Converts (RA, DEC, z) to comoving Cartesian positions in Mpc."""
+    dist = np.interp(z, z_grid, dc_grid)
+    ra_rad = np.radians(ra)
+    dec_rad = np.radians(dec)
+    cos_dec = np.cos(dec_rad)
+    return np.column_stack((dist * cos_dec * np.cos(ra_rad),
+                            dist * cos_dec * np.sin(ra_rad),
+                            dist * np.sin(dec_rad)))
+
+def load_catalog(path):
+    """Reads RA, DEC and Z columns from a CSV or whitespace-separated catalog."""
+    sep = ',' if path.endswith('.csv') else r'\s+'
+    df = pd.read_csv(path, sep=sep, comment='#')
+    df.columns = [col.strip().upper() for col in df.columns]
+    missing = [col for col in ('RA', 'DEC', 'Z') if col not in df.columns]
+    if missing:
+        raise ValueError(f"Catalog {path} is missing columns: {', '.join(missing)}")
+    return df['RA'].values, df['DEC'].values, df['Z'].values
+
+# --- 2. Parallel Pair Counting ---
+# Each worker builds the tree of the "other" catalog once (in the initializer)
+# and then counts pairs for index chunks of the first catalog.
+_worker_points = None
+_worker_other_tree = None
+
+def _init_worker(points, other_points, leafsize):
+    global _worker_points, _worker_other_tree
+    _worker_points = points
+    _worker_other_tree = cKDTree(other_points, leafsize=leafsize)
+
+def _count_chunk(args):
+    start, stop, r_edges, leafsize = args
+    chunk_tree = cKDTree(_worker_points[start:stop], leafsize=leafsize)
+    return chunk_tree.count_neighbors(_worker_other_tree, r_edges, cumulative=True)
+
+def count_pairs(points, other_points, r_edges, n_workers=None, chunk_size=100000, leafsize=32):
+    """
+    Counts ordered pairs (i in points, j in other_points) with separation
+    below each edge in r_edges, returning the number of pairs per r bin.
+    For an auto-count pass the same array twice; self-pairs cancel in the
+    binning and the result is divided by two (unordered pairs).
+    """
+    r_edges = np.asarray(r_edges, dtype=float)
+    is_auto = other_points is points
+    n_points = len(points)
+    if n_points == 0 or len(other_points) == 0:
+        return np.zeros(len(r_edges) - 1)
+
+    n_workers = n_workers or os.cpu_count() or 1
+    chunks = [(start, min(start + chunk_size, n_points), r_edges, leafsize)
+              for start in range(0, n_points, chunk_size)]
+
+    if n_workers == 1 or len(chunks) == 1:
+        _init_worker(points, other_points, leafsize)
+        cumulative = sum(_count_chunk(chunk) for chunk in chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(chunks)),
+                                 initializer=_init_worker,
+                                 initargs=(points, other_points, leafsize)) as pool:
+            cumulative = sum(pool.map(_count_chunk, chunks))
+
+    counts = np.diff(np.asarray(cumulative, dtype=float))
+    return counts / 2.0 if is_auto else counts
+
+# --- 3. Landy-Szalay Estimator ---
+def landy_szalay(dd, dr, rr, n_data, n_random):
+    """
+    Landy-Szalay estimator xi = (DD - 2DR + RR) / RR with normalized counts.
+    Bins without random pairs (or without data pairs, for the error) are NaN.
+    """
+    dd_norm = dd / (n_data * (n_data - 1) / 2.0)
+    dr_norm = dr / (n_data * n_random)
+    rr_norm = rr / (n_random * (n_random - 1) / 2.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xi = np.where(rr > 0, (dd_norm - 2.0 * dr_norm + rr_norm) / rr_norm, np.nan)
+        # Poisson error on the estimator, driven by the data pair counts
+        xi_err = np.where(dd > 0, (1.0 + xi) / np.sqrt(dd), np.nan)
+    return xi, xi_err
+
+def measure_xi(data_xyz, data_z, random_xyz, random_z, r_edges, z_edges, n_workers=None):
+    """
+    Measures xi(r, z) in each redshift shell of z_edges. Pairs are counted
+    between objects of the same shell. Returns xi, xi_err and DD with shape
+    (n_z_bins, n_r_bins).
+    """
+    n_z_bins = len(z_edges) - 1
+    n_r_bins = len(r_edges) - 1
+    xi = np.full((n_z_bins, n_r_bins), np.nan)
+    xi_err = np.full((n_z_bins, n_r_bins), np.nan)
+    dd_all = np.zeros((n_z_bins, n_r_bins))
+
+    for k in range(n_z_bins):
+        in_shell_d = (data_z >= z_edges[k]) & (data_z < z_edges[k + 1])
+        in_shell_r = (random_z >= z_edges[k]) & (random_z < z_edges[k + 1])
+        d = np.ascontiguousarray(data_xyz[in_shell_d])
+        r = np.ascontiguousarray(random_xyz[in_shell_r])
+        n_d, n_r = len(d), len(r)
+        if n_d < 2 or n_r < 2:
+            continue
+        dd = count_pairs(d, d, r_edges, n_workers)
+        dr = count_pairs(d, r, r_edges, n_workers)
+        rr = count_pairs(r, r, r_edges, n_workers)
+        xi[k], xi_err[k] = landy_szalay(dd, dr, rr, n_d, n_r)
+        dd_all[k] = dd
+    return xi, xi_err, dd_all
+
+# --- 4. Power-Law Fit ---
+def fit_power_law(r_centers, xi, xi_err, z_center):
+    """
+    Fits xi(r) = (r / r0)^(-gamma(z)) with the slope fixed to the model's
+    gamma_z and r0 free, and returns (r0, chi2, dof). A free-slope fit
+    (r0, gamma) is also returned for comparison. Both fits are weighted
+    linear least squares in ln(xi), so they are exact and need no starting point.
+    """
+    valid = np.isfinite(xi) & np.isfinite(xi_err) & (xi > 0) & (xi_err > 0)
+    if valid.sum() < 3:
+        return None
+    log_r = np.log(r_centers[valid])
+    y = np.log(xi[valid])
+    w = (xi[valid] / xi_err[valid])**2  # 1 / sigma_ln(xi)^2
+    gamma_model = gamma_z(z_center)
+
+    # Fixed slope: ln xi = gamma * ln r0 - gamma * ln r
+    intercept = np.sum(w * (y + gamma_model * log_r)) / np.sum(w)
+    chi2_fixed = np.sum(w * (y - intercept + gamma_model * log_r)**2)
+
+    # Free slope: ln xi = a - gamma * ln r
+    slope, intercept_free = np.polyfit(log_r, y, 1, w=np.sqrt(w))
+    chi2_free = np.sum(w * (y - intercept_free - slope * log_r)**2)
+
+    return {
+        "gamma_model": gamma_model, "r0": np.exp(intercept / gamma_model), "chi2": chi2_fixed,
+        "dof": len(y) - 1, "gamma_free": -slope, "r0_free": np.exp(intercept_free / -slope),
+        "chi2_free": chi2_free, "dof_free": len(y) - 2,
+    }
+
+# --- 5. Synthetic Catalogs (for demonstration without survey data) ---
+def synthetic_catalogs(n_data, n_random, z_min, z_max, seed=42):
+    """Generates a clustered mock catalog and an unclustered random catalog."""
+    rng = np.random.default_rng(seed)
+
+    def uniform_sky(n):
+        ra = rng.uniform(0.0, 360.0, n)
+        dec = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, n)))
+        return ra, dec, rng.uniform(z_min, z_max, n)
+
+    # Clustered data: members scattered around parent positions
+    n_parents = max(n_data // 20, 1)
+    ra_p, dec_p, z_p = uniform_sky(n_parents)
+    parent = rng.integers(0, n_parents, n_data)
+    ra = (ra_p[parent] + rng.normal(0.0, 0.3, n_data)) % 360.0
+    dec = np.clip(dec_p[parent] + rng.normal(0.0, 0.3, n_data), -90.0, 90.0)
+    z = np.clip(z_p[parent] + rng.normal(0.0, 0.002, n_data), z_min, z_max)
+    return (ra, dec, z), uniform_sky(n_random)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Landy-Szalay xi(r, z) estimator for the Dynamic Fractal Model.")
+    parser.add_argument("data", nargs="?", help="Galaxy catalog with RA, DEC, Z columns.")
+    parser.add_argument("randoms", nargs="?", help="Random catalog with RA, DEC, Z columns.")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N",
+                        help="Use a synthetic clustered catalog of N galaxies instead of files.")
+    parser.add_argument("--r-min", type=float, default=1.0, help="Minimum separation in Mpc.")
+    parser.add_argument("--r-max", type=float, default=50.0, help="Maximum separation in Mpc.")
+    parser.add_argument("--r-bins", type=int, default=12, help="Number of logarithmic r bins.")
+    parser.add_argument("--z-edges", type=str, default="0.1,0.5,1.0,1.5", help="Comma-separated redshift bin edges.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: all cores).")
+    args = parser.parse_args()
+
+    # --- Diagnostic ---
+    print("### Execution Environment Diagnostic ###")
+    print(f"Python Version: {platform.python_version()}")
+    print(f"NumPy Version: {np.__version__}")
+    print(f"SciPy Version: {scipy.__version__}")
+    print("-" * 38 + "\n")
+
+    print("--- Script for Galaxy 2PCF (Landy-Szalay) using GLOBAL fit parameters ---")
+    z_edges = np.array([float(v) for v in args.z_edges.split(",")])
+    r_edges = np.logspace(np.log10(args.r_min), np.log10(args.r_max), args.r_bins + 1)
+    r_centers = np.sqrt(r_edges[:-1] * r_edges[1:])
+
+    print("\n[STEP 1] Loading galaxy and random catalogs.")
+    if args.synthetic:
+        (ra_d, dec_d, z_d), (ra_r, dec_r, z_r) = synthetic_catalogs(
+            args.synthetic, 3 * args.synthetic, z_edges[0], z_edges[-1])
+        print(f"-> Generated {len(z_d)} synthetic galaxies and {len(z_r)} randoms.")
+    elif args.data and args.randoms:
+        try:
+            ra_d, dec_d, z_d = load_catalog(args.data)
+            ra_r, dec_r, z_r = load_catalog(args.randoms)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"-> ERROR: {e}")
+            sys.exit(1)
+        print(f"-> Successfully loaded {len(z_d)} galaxies and {len(z_r)} randoms.")
+    else:
+        parser.print_usage()
+        print("-> ERROR: Provide data and random catalogs, or --synthetic N.")
+        sys.exit(1)
+
+    print("\n[STEP 2] Converting to comoving coordinates with the GLOBAL best-fit parameters.")
+    H0_opt, Om_opt, Gamma_opt, A1_opt, A2_opt = (73.24, 0.2974, 0.433, 0.031, 0.019)
+    model_args = (H0_opt, Om_opt, Gamma_opt, A1_opt, A2_opt)
+    print(f"-> Parameters: H0={H0_opt}, Om={Om_opt}, Gamma={Gamma_opt}, A1={A1_opt}, A2={A2_opt}")
+    z_grid, dc_grid = comoving_distance_table(max(z_d.max(), z_r.max()) * 1.01, model_args)
+    data_xyz = to_cartesian(ra_d, dec_d, z_d, z_grid, dc_grid)
+    random_xyz = to_cartesian(ra_r, dec_r, z_r, z_grid, dc_grid)
+
+    print(f"\n[STEP 3] Counting DD, DR and RR pairs on {args.workers or os.cpu_count()} cores.")
+    xi, xi_err, dd = measure_xi(data_xyz, z_d, random_xyz, z_r, r_edges, z_edges, args.workers)
+
+    print("\n[STEP 4] Fitting xi(r, z) against the model's power law with gamma(z).")
+    chi2_total, dof_total = 0.0, 0
+    for k in range(len(z_edges) - 1):
+        z_center = 0.5 * (z_edges[k] + z_edges[k + 1])
+        print(f"--- Shell {z_edges[k]:.2f} <= z < {z_edges[k + 1]:.2f} ---")
+        print("   r [Mpc]      xi          err        DD")
+        for r, x, e, n in zip(r_centers, xi[k], xi_err[k], dd[k]):
+            print(f"   {r:8.3f}  {x:10.4f}  {e:10.4f}  {n:10.0f}")
+        fit = fit_power_law(r_centers, xi[k], xi_err[k], z_center)
+        if fit is None:
+            print("-> Not enough positive xi bins for a fit.")
+            continue
+        chi2_total += fit["chi2"]
+        dof_total += fit["dof"]
+        print(f"-> Model slope gamma({z_center:.2f}) = {fit['gamma_model']:.3f}: "
+              f"r0 = {fit['r0']:.2f} Mpc, Chi^2/dof = {fit['chi2'] / max(fit['dof'], 1):.3f}")
+        print(f"-> Free slope fit: gamma = {fit['gamma_free']:.3f}, r0 = {fit['r0_free']:.2f} Mpc, "
+              f"Chi^2/dof = {fit['chi2_free'] / max(fit['dof_free'], 1):.3f}")
+
+    # --- Final Results ---
+    print("\n[STEP 5] Final Result.")
+    print("-" * 45)
+    if dof_total > 0:
+        print(f"FINAL RESULT: Chi^2 value = {chi2_total:.3f}")
+        print(f"FINAL RESULT: Chi^2/dof for Galaxy 2PCF = {chi2_total / dof_total:.3f}")
+    else:
+        print("FINAL RESULT: No redshift shell had enough pairs for a fit.")
+    print("-" * 45)
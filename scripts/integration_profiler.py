@@ -0,0 +1,241 @@
+import numpy as np
+import platform
+import scipy
+import scipy.integrate
+import sys
+import os
+import io
+import json
+import time
+import bisect
+import runpy
+import argparse
+import warnings
+import contextlib
+from collections import defaultdict
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Integration Profiler (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# Opt-in profiler for the distance integrals of the probe scripts. While it
+# is active:
+#
+#   - scipy.integrate.quad is replaced by a wrapper that records, for every
+#     call site (script:function), the number of integrals, the integrand
+#     evaluations (neval), the adaptive subdivisions ('last' of full_output)
+#     and the time, and buckets every integrand evaluation by redshift;
+#   - the H(z) and phi(z) kernels (H_model*, get_hubble_rate, phi_z,
+#     get_fractal_dimension in the scripts, the registry's _hubble_*) are
+#     counted through a profile hook, with the redshifts passed as their first
+#     argument bucketed the same way.
+#
+# Nothing changes when the profiler is not used. Target scripts run
+# unmodified through runpy with the patch applied before they import quad.
+#
+# Usage:
+#   python integration_profiler.py SNIa.py
+#   python integration_profiler.py CMB.py bao.py SNIa.py --show-output --json profile.json
+# ==============================================================================
+
+# Redshift buckets of the report (upper edge open)
+Z_EDGES = [0.0, 0.1, 0.5, 1.0, 2.0, 3.0, 10.0, 100.0, 1000.0, 1100.0, np.inf]
+# Kernels take the redshift(s) as their first positional argument
+KERNEL_NAMES = {"H_model", "H_model_fractal", "H_model_lcdm", "get_hubble_rate", "phi_z", "get_fractal_dimension",
+                "_hubble_fractal", "_hubble_lcdm"}
+SLOWEST_INTEGRALS = 10
+
+def z_bucket_labels():
+    return [f"[{lo:g}, {hi:g})" for lo, hi in zip(Z_EDGES[:-1], Z_EDGES[1:])]
+
+def _bucket_counts(z):
+    """Number of redshifts of an array falling in each bucket."""
+    z = np.asarray(z, dtype=float).ravel()
+    index = np.clip(np.searchsorted(Z_EDGES, z, side="right") - 1, 0, len(Z_EDGES) - 2)
+    return np.bincount(index, minlength=len(Z_EDGES) - 1)
+
+
+class IntegrationProfiler:
+    """Records quad calls and H(z) kernel calls while active (use as a context manager)."""
+
+    def __init__(self, kernels=True):
+        self.kernels = kernels
+        n_buckets = len(Z_EDGES) - 1
+        self.sites = defaultdict(lambda: {"integrals": 0, "neval": 0, "subdivisions": 0, "max_subdivisions": 0,
+                                          "warnings": 0, "time": 0.0, "evals_by_z": np.zeros(n_buckets, dtype=np.int64),
+                                          "time_by_z": np.zeros(n_buckets)})
+        self.kernel_stats = defaultdict(lambda: {"calls": 0, "evaluations": 0, "time": 0.0,
+                                                 "evals_by_z": np.zeros(n_buckets, dtype=np.int64)})
+        self.slowest = []
+        self._original_quad = None
+        self._kernel_frames = []
+        self._previous_profile = None
+
+    # --- Activation ---
+    def __enter__(self):
+        self._original_quad = scipy.integrate.quad
+        scipy.integrate.quad = self._quad
+        if self.kernels:
+            self._previous_profile = sys.getprofile()
+            sys.setprofile(self._profile_hook)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.kernels:
+            sys.setprofile(self._previous_profile)
+        scipy.integrate.quad = self._original_quad
+
+    # --- quad wrapper ---
+    def _quad(self, func, a, b, args=(), full_output=0, **kwargs):
+        caller = sys._getframe(1).f_code
+        site = self.sites[f"{os.path.basename(caller.co_filename)}:{caller.co_name}"]
+        edges = Z_EDGES
+
+        def integrand(x, *func_args):
+            started_at = time.perf_counter()
+            value = func(x, *func_args)
+            bucket = min(max(bisect.bisect_right(edges, x) - 1, 0), len(edges) - 2)
+            site["evals_by_z"][bucket] += 1
+            site["time_by_z"][bucket] += time.perf_counter() - started_at
+            return value
+
+        started_at = time.perf_counter()
+        result = self._original_quad(integrand, a, b, args=args, full_output=1, **kwargs)
+        elapsed = time.perf_counter() - started_at
+        info = result[2]
+        subdivisions = int(info.get("last", 0))
+        site["integrals"] += 1
+        site["neval"] += int(info.get("neval", 0))
+        site["subdivisions"] += subdivisions
+        site["max_subdivisions"] = max(site["max_subdivisions"], subdivisions)
+        site["time"] += elapsed
+        self._keep_slowest(f"{os.path.basename(caller.co_filename)}:{caller.co_name}", a, b, info, elapsed)
+        if len(result) > 3:
+            site["warnings"] += 1
+            if not full_output:
+                # full_output=1 suppresses quad's own warning; give it back to the caller
+                warnings.warn(result[3], scipy.integrate.IntegrationWarning, stacklevel=2)
+        return result if full_output else result[:2]
+
+    def _keep_slowest(self, site_name, a, b, info, elapsed):
+        self.slowest.append({"site": site_name, "a": float(a), "b": float(b), "neval": int(info.get("neval", 0)),
+                             "subdivisions": int(info.get("last", 0)), "time": elapsed})
+        if len(self.slowest) > 4 * SLOWEST_INTEGRALS:
+            self.slowest = sorted(self.slowest, key=lambda s: -s["neval"])[:SLOWEST_INTEGRALS]
+
+    # --- Kernel hook ---
+    def _profile_hook(self, frame, event, arg):
+        if event == "call":
+            code = frame.f_code
+            if code.co_name in KERNEL_NAMES and code.co_argcount:
+                # Arguments are read on entry, before the kernel can rebind them
+                z = frame.f_locals.get(code.co_varnames[0], 0.0)
+                # Registry kernels receive the parameters as (n_sets, 1) columns
+                columns = frame.f_locals.get("p")
+                n_sets = next(iter(columns.values())).shape[0] if isinstance(columns, dict) and columns else 1
+                self._kernel_frames.append((frame, time.perf_counter(), z, n_sets))
+        elif event == "return" and self._kernel_frames and self._kernel_frames[-1][0] is frame:
+            _, started_at, z, n_sets = self._kernel_frames.pop()
+            code = frame.f_code
+            stats = self.kernel_stats[f"{os.path.basename(code.co_filename)}:{code.co_name}"]
+            counts = _bucket_counts(z) * n_sets
+            stats["calls"] += 1
+            stats["evaluations"] += int(counts.sum())
+            stats["evals_by_z"] += counts
+            stats["time"] += time.perf_counter() - started_at
+
+    # --- Results ---
+    def to_dict(self):
+        return {
+            "z_buckets": z_bucket_labels(),
+            "sites": {name: {key: value.tolist() if isinstance(value, np.ndarray) else value
+                             for key, value in s.items()} for name, s in self.sites.items()},
+            "kernels": {name: {key: value.tolist() if isinstance(value, np.ndarray) else value
+                               for key, value in s.items()} for name, s in self.kernel_stats.items()},
+            "slowest_integrals": sorted(self.slowest, key=lambda s: -s["neval"])[:SLOWEST_INTEGRALS],
+        }
+
+    def report(self):
+        labels = z_bucket_labels()
+        lines = []
+        total_time = sum(s["time"] for s in self.sites.values()) or 1.0
+        lines.append("--- quad call sites (sorted by time) ---")
+        lines.append(f"   {'site':<48s}{'integrals':>10s}{'neval':>11s}{'neval/int':>10s}{'subdiv':>8s}"
+                     f"{'max':>5s}{'warn':>5s}{'time [s]':>10s}{'share':>7s}")
+        for name, s in sorted(self.sites.items(), key=lambda item: -item[1]["time"]):
+            lines.append(f"   {name:<48s}{s['integrals']:10d}{s['neval']:11d}{s['neval'] / max(s['integrals'], 1):10.1f}"
+                         f"{s['subdivisions']:8d}{s['max_subdivisions']:5d}{s['warnings']:5d}{s['time']:10.3f}"
+                         f"{s['time'] / total_time:7.1%}")
+
+        lines.append("\n--- Integrand evaluations by redshift range ---")
+        evals = sum((s["evals_by_z"] for s in self.sites.values()), np.zeros(len(labels), dtype=np.int64))
+        times = sum((s["time_by_z"] for s in self.sites.values()), np.zeros(len(labels)))
+        lines.append(f"   {'z range':<16s}{'evaluations':>12s}{'time [s]':>10s}{'share':>7s}   dominant site")
+        for i, label in enumerate(labels):
+            if evals[i] == 0:
+                continue
+            dominant = max(self.sites.items(), key=lambda item: item[1]["evals_by_z"][i])[0]
+            lines.append(f"   {label:<16s}{evals[i]:12d}{times[i]:10.3f}{evals[i] / max(evals.sum(), 1):7.1%}   {dominant}")
+
+        lines.append(f"\n--- Most expensive single integrals (top {SLOWEST_INTEGRALS} by neval) ---")
+        for s in sorted(self.slowest, key=lambda s: -s["neval"])[:SLOWEST_INTEGRALS]:
+            lines.append(f"   {s['site']:<48s} z in [{s['a']:g}, {s['b']:g}]: neval={s['neval']}, "
+                         f"subdivisions={s['subdivisions']}, {s['time'] * 1e3:.2f} ms")
+
+        if self.kernels:
+            lines.append("\n--- H(z) kernels ---")
+            lines.append(f"   {'kernel':<48s}{'calls':>10s}{'z points':>12s}{'time [s]':>10s}   busiest z range")
+            for name, s in sorted(self.kernel_stats.items(), key=lambda item: -item[1]["evaluations"]):
+                busiest = labels[int(np.argmax(s["evals_by_z"]))]
+                lines.append(f"   {name:<48s}{s['calls']:10d}{s['evaluations']:12d}{s['time']:10.3f}   {busiest}")
+        return "\n".join(lines)
+
+def run_script(path, script_args=(), show_output=False):
+    """Runs a script as __main__ from its own directory; returns its exit status."""
+    script_dir = os.path.dirname(os.path.abspath(path))
+    previous_cwd, previous_argv = os.getcwd(), sys.argv
+    sys.argv = [path] + list(script_args)
+    os.chdir(script_dir)
+    output = contextlib.nullcontext() if show_output else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with output:
+            runpy.run_path(os.path.abspath(os.path.join(previous_cwd, path)), run_name="__main__")
+        return 0
+    except SystemExit as exc:
+        return exc.code if isinstance(exc.code, int) else 0
+    finally:
+        os.chdir(previous_cwd)
+        sys.argv = previous_argv
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the distance integrals of probe scripts.")
+    parser.add_argument("scripts", nargs="+", help="Scripts to run under the profiler (e.g. SNIa.py CMB.py).")
+    parser.add_argument("--args", default="", help="Arguments passed to every script (one quoted string).")
+    parser.add_argument("--show-output", action="store_true", help="Let the scripts print their own output.")
+    parser.add_argument("--no-kernels", action="store_true", help="Profile quad only (no H(z) kernel hook).")
+    parser.add_argument("--json", metavar="PATH", help="Also write the raw profile as JSON.")
+    args = parser.parse_args()
+
+    # --- Diagnostic ---
+    print("### Execution Environment Diagnostic ###")
+    print(f"Python Version: {platform.python_version()}")
+    print(f"NumPy Version: {np.__version__}")
+    print(f"SciPy Version: {scipy.__version__}")
+    print("-" * 38 + "\n")
+
+    profiler = IntegrationProfiler(kernels=not args.no_kernels)
+    for script in args.scripts:
+        started_at = time.perf_counter()
+        with profiler:
+            status = run_script(script, args.args.split(), args.show_output)
+        print(f"-> {script}: exit status {status}, {time.perf_counter() - started_at:.2f} s (profiled)")
+
+    print()
+    print(profiler.report())
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(profiler.to_dict(), f, indent=2)
+        print(f"\n-> Profile written to {args.json}")
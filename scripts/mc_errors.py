@@ -0,0 +1,235 @@
+import numpy as np
+import platform
+import scipy
+import time
+import argparse
+import model_registry as registry
+from probes import data_cc, data_bao
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Monte Carlo Error Propagation (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# This script gives the Chi^2 values of Cosmic_Chronometers.py and bao.py an
+# uncertainty. It draws 10^5-10^6 realizations of the data:
+#
+#   - cc_gaussian:  H(z) points redrawn from their errors
+#   - cc_bootstrap: CC points resampled with replacement
+#   - bao_gaussian: DESI ratios redrawn from their errors
+#
+# and, for each realization, recomputes Chi^2 at the GLOBAL best-fit
+# parameters and the best-fit (H0, Om) with Gamma, A1, A2 held fixed.
+# Fits whose Om minimum lies on an end of the grid keep that bound value and
+# are flagged (at_bound); --om-range widens the grid.
+#
+# No realization is handled in a Python loop. Every observable scales as H0
+# (H) or 1/H0 (BAO ratios), so the best H0 at fixed Om is a closed-form
+# weighted ratio, and all realizations are profiled over an Om grid with
+# matrix products. Bootstrap samples are represented by multinomial counts.
+# Realizations are processed in blocks only to bound memory.
+# ==============================================================================
+
+PARAMS_OPT = registry.default_parameters("fractal")
+# Om is profiled over the registry prior range by default
+OM_RANGE = tuple(float(bound[1]) for bound in registry.parameter_bounds("fractal"))
+OM_POINTS = 551
+
+def om_grid(om_range=OM_RANGE, points=OM_POINTS):
+    return np.linspace(om_range[0], om_range[1], points)
+
+def _grid_params(om_grid):
+    """Fractal parameter sets with H0 = 1, Om on the grid and the published shape parameters."""
+    params = np.tile(PARAMS_OPT, (len(om_grid), 1))
+    params[:, 0] = 1.0
+    params[:, 1] = om_grid
+    return params
+
+def profile_fit(y, weights, templates, counts=None):
+    """
+    Best fit of y ~ A * template_g over amplitude A (closed form) and grid
+    index g (minimum refined by a parabola), for every realization at once.
+
+    y: (R, N) data, weights: (N,) inverse variances, templates: (G, N),
+    counts: optional (R, N) bootstrap multiplicities.
+    Returns (amplitude, grid_position, chi2_min, at_bound), each of shape (R,),
+    where grid_position is a fractional index into the grid. Realizations whose
+    minimum lies on the first or last grid point keep that point (and its
+    closed-form amplitude) and are flagged in at_bound.
+    """
+    w = weights[None, :] if counts is None else counts * weights[None, :]
+    s_yt = (w * y) @ templates.T                                  # (R, G)
+    s_tt = (w @ (templates**2).T) if counts is not None else np.broadcast_to(templates**2 @ weights, s_yt.shape)
+    s_yy = np.sum(w * y**2, axis=1)
+    chi2 = s_yy[:, None] - s_yt**2 / s_tt
+    amplitude = s_yt / s_tt
+
+    rows = np.arange(len(y))
+    g_min = np.argmin(chi2, axis=1)
+    at_bound = (g_min == 0) | (g_min == templates.shape[0] - 1)
+    g = np.clip(g_min, 1, templates.shape[0] - 2)
+    c_m, c_0, c_p = chi2[rows, g - 1], chi2[rows, g], chi2[rows, g + 1]
+    curvature = c_m - 2 * c_0 + c_p
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.where(curvature > 0, 0.5 * (c_m - c_p) / curvature, 0.0)
+    offset = np.clip(offset, -1.0, 1.0)
+    # Quadratic interpolation of the amplitude and Chi^2 at the refined minimum
+    l_m, l_0, l_p = 0.5 * offset * (offset - 1), 1 - offset**2, 0.5 * offset * (offset + 1)
+    a_best = l_m * amplitude[rows, g - 1] + l_0 * amplitude[rows, g] + l_p * amplitude[rows, g + 1]
+    chi2_best = l_m * c_m + l_0 * c_0 + l_p * c_p
+    return (np.where(at_bound, amplitude[rows, g_min], a_best), np.where(at_bound, g_min, g + offset),
+            np.where(at_bound, chi2[rows, g_min], chi2_best), at_bound)
+
+def _om_at(position, grid):
+    return np.interp(position, np.arange(len(grid)), grid)
+
+# --- Cosmic Chronometers ---
+def cc_ensemble(n_realizations, rng, bootstrap=False, block=20000, grid=None):
+    z, hz_obs, sigma = data_cc.T
+    n = len(z)
+    weights = 1.0 / sigma**2
+    hz_model = registry.hubble_rate("fractal", z, PARAMS_OPT)[0]
+    grid = om_grid() if grid is None else grid
+    templates = registry.hubble_rate("fractal", z, _grid_params(grid))   # E(z; Om), H0 = 1
+
+    out = {key: np.empty(n_realizations) for key in ("chi2", "H0", "Om")}
+    out["at_bound"] = np.empty(n_realizations, dtype=bool)
+    for start in range(0, n_realizations, block):
+        stop = min(start + block, n_realizations)
+        size = stop - start
+        if bootstrap:
+            counts = rng.multinomial(n, np.full(n, 1.0 / n), size=size).astype(float)
+            y = np.broadcast_to(hz_obs, (size, n))
+        else:
+            counts = None
+            y = hz_obs + sigma * rng.standard_normal((size, n))
+        residual2 = ((y - hz_model) / sigma)**2
+        out["chi2"][start:stop] = np.sum(residual2 if counts is None else counts * residual2, axis=1)
+        h0, position, _, at_bound = profile_fit(y, weights, templates, counts)
+        out["H0"][start:stop] = h0
+        out["Om"][start:stop] = _om_at(position, grid)
+        out["at_bound"][start:stop] = at_bound
+    out["dof"] = n - len(PARAMS_OPT)
+    out["chi2_data"] = np.sum(((hz_obs - hz_model) / sigma)**2)
+    return out
+
+# --- BAO (D_V/rd at the first point, D_H/rd after, as in bao.py) ---
+def bao_templates(params):
+    """BAO ratios for every parameter set, shape (n_sets, 3)."""
+    z = data_bao[:, 0]
+    rd = registry.sound_horizon("fractal", params)[:, None]
+    dist = registry.c / registry.hubble_rate("fractal", z, params)
+    dist[:, 0] = registry.volume_averaged_distance("fractal", z[:1], params)[:, 0]
+    return dist / rd
+
+def bao_ensemble(n_realizations, rng, block=20000, grid=None):
+    z, obs, sigma = data_bao.T
+    weights = 1.0 / sigma**2
+    ratio_model = bao_templates(PARAMS_OPT)[0]
+    # Ratios scale as 1/H0: templates at H0 = 1, amplitude = 1/H0
+    grid = om_grid() if grid is None else grid
+    templates = bao_templates(_grid_params(grid))
+
+    out = {key: np.empty(n_realizations) for key in ("chi2", "H0", "Om")}
+    out["at_bound"] = np.empty(n_realizations, dtype=bool)
+    for start in range(0, n_realizations, block):
+        stop = min(start + block, n_realizations)
+        y = obs + sigma * rng.standard_normal((stop - start, len(z)))
+        out["chi2"][start:stop] = np.sum(((y - ratio_model) / sigma)**2, axis=1)
+        inverse_h0, position, _, at_bound = profile_fit(y, weights, templates)
+        out["H0"][start:stop] = 1.0 / inverse_h0
+        out["Om"][start:stop] = _om_at(position, grid)
+        out["at_bound"][start:stop] = at_bound
+    out["dof"] = len(z)
+    out["chi2_data"] = np.sum(((obs - ratio_model) / sigma)**2)
+    return out
+
+# --- Summaries ---
+def summarize(values):
+    """Statistics of the finite values; None if there are fewer than two."""
+    values = values[np.isfinite(values)]
+    if values.size < 2:
+        return None
+    p2, p16, p50, p84, p97 = np.percentile(values, [2.5, 16, 50, 84, 97.5])
+    return {"mean": values.mean(), "std": values.std(ddof=1), "median": p50,
+            "p16": p16, "p84": p84, "p2.5": p2, "p97.5": p97}
+
+def text_histogram(values, bins=30, width=50):
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return ["   (no finite values)"]
+    counts, edges = np.histogram(values, bins=bins)
+    scale = width / max(counts.max(), 1)
+    return [f"   {lo:12.4g} | {'#' * int(round(count * scale)):<{width}s} {count}"
+            for lo, count in zip(edges[:-1], counts)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo error propagation for the CC and BAO Chi^2.")
+    parser.add_argument("--realizations", type=int, default=100000, help="Realizations per ensemble.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bins", type=int, default=30, help="Histogram bins.")
+    parser.add_argument("--save", metavar="PATH", help="Save the realizations and histograms to an .npz file.")
+    parser.add_argument("--om-range", type=float, nargs=2, metavar=("LO", "HI"), default=OM_RANGE,
+                        help=f"Om grid of the profiled fits (default: the prior range {OM_RANGE[0]:g} {OM_RANGE[1]:g}).")
+    args = parser.parse_args()
+    if not 0.0 < args.om_range[0] < args.om_range[1] <= 1.0:
+        parser.error("--om-range needs 0 < LO < HI <= 1.")
+    grid = om_grid(args.om_range)
+
+    # --- Diagnostic ---
+    print("### Execution Environment Diagnostic ###")
+    print(f"Python Version: {platform.python_version()}")
+    print(f"NumPy Version: {np.__version__}")
+    print(f"SciPy Version: {scipy.__version__}")
+    print("-" * 38 + "\n")
+
+    print("--- Script for Monte Carlo error propagation (CC and BAO) ---")
+    print("\n[STEP 1] Using GLOBAL best-fit parameters from the paper.")
+    H0_opt, Om_opt, Gamma_opt, A1_opt, A2_opt = PARAMS_OPT
+    print(f"-> Parameters: H0={H0_opt}, Om={Om_opt}, Gamma={Gamma_opt}, A1={A1_opt}, A2={A2_opt}")
+    print(f"-> Best-fit (H0, Om) profiled on {len(grid)} Om values in [{grid[0]:g}, {grid[-1]:g}].")
+
+    print(f"\n[STEP 2] Drawing {args.realizations} realizations per ensemble.")
+    rng = np.random.default_rng(args.seed)
+    ensembles = {}
+    for name, run in (("cc_gaussian", lambda: cc_ensemble(args.realizations, rng, grid=grid)),
+                      ("cc_bootstrap", lambda: cc_ensemble(args.realizations, rng, bootstrap=True, grid=grid)),
+                      ("bao_gaussian", lambda: bao_ensemble(args.realizations, rng, grid=grid))):
+        started_at = time.perf_counter()
+        ensembles[name] = run()
+        print(f"-> {name}: {time.perf_counter() - started_at:.2f} s")
+
+    print("\n[STEP 3] Summary statistics.")
+    saved = {}
+    for name, result in ensembles.items():
+        print(f"--- {name} (data Chi^2 = {result['chi2_data']:.3f}, dof = {result['dof']}) ---")
+        print(f"   {'quantity':<10s}{'mean':>12s}{'std':>12s}{'median':>12s}{'16%':>12s}{'84%':>12s}")
+        for key in ("chi2", "H0", "Om"):
+            s = summarize(result[key])
+            saved[f"{name}_{key}"] = result[key]
+            if s is None:
+                print(f"   {key:<10s}{'(no finite values)':>60s}")
+                continue
+            print(f"   {key:<10s}{s['mean']:12.4f}{s['std']:12.4f}{s['median']:12.4f}{s['p16']:12.4f}{s['p84']:12.4f}")
+            counts, edges = np.histogram(result[key][np.isfinite(result[key])], bins=args.bins)
+            saved[f"{name}_{key}_hist_counts"] = counts
+            saved[f"{name}_{key}_hist_edges"] = edges
+        saved[f"{name}_at_bound"] = result["at_bound"]
+        at_bound = result["at_bound"].mean()
+        print(f"-> {at_bound:.1%} of the fits have their Om minimum at a grid bound [{grid[0]:g}, {grid[-1]:g}]"
+              + ("; widen it with --om-range." if at_bound > 0 else "."))
+        chi2_dof = result["chi2"] / result["dof"]
+        print(f"-> Chi^2/dof = {np.median(chi2_dof):.3f} (+{np.percentile(chi2_dof, 84) - np.median(chi2_dof):.3f} "
+              f"/ -{np.median(chi2_dof) - np.percentile(chi2_dof, 16):.3f})")
+
+    print("\n[STEP 4] Histograms.")
+    for name, result in ensembles.items():
+        for key in ("chi2", "H0", "Om"):
+            print(f"--- {name}: {key} ---")
+            print("\n".join(text_histogram(result[key], bins=args.bins)))
+
+    if args.save:
+        np.savez_compressed(args.save, **saved)
+        print(f"\n-> Realizations and histograms saved to {args.save}")
@@ -0,0 +1,217 @@
+import numpy as np
+from collections import namedtuple
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Model Registry (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# This module holds every expansion model the probes can be evaluated against,
+# together with its parameter schema (names, published values and prior
+# bounds). All models share one batched interface:
+#
+#   hubble_rate(name, z, params)          -> H(z),  shape (n_sets, n_z)
+#   comoving_distance(name, z, params)    -> D_C(z) in Mpc, shape (n_sets, n_z)
+#   sound_horizon(name, params)           -> rd in Mpc, shape (n_sets,)
+#
+# where params is an array of shape (n_sets, n_params) (a single parameter
+# vector is also accepted). New models are added with register_model().
+# ==============================================================================
+
+c = 299792.458
+
+Parameter = namedtuple("Parameter", ["name", "default", "lower", "upper"])
+
+MODELS = {}
+
+def register_model(name, hubble, parameters, rd=None, description=""):
+    """
+    Registers a model. hubble(z, p) and rd(p) receive p as a dict mapping each
+    parameter name to a column array of shape (n_sets, 1).
+    """
+    if name in MODELS:
+        raise ValueError(f"Model '{name}' is already registered.")
+    MODELS[name] = {
+        "name": name,
+        "hubble": hubble,
+        "rd": rd,
+        "parameters": list(parameters),
+        "description": description,
+    }
+    return MODELS[name]
+
+def get_model(name):
+    """Returns the registry entry of a model."""
+    try:
+        return MODELS[name]
+    except KeyError:
+        raise KeyError(f"Unknown model '{name}'. Registered models: {', '.join(MODELS)}") from None
+
+def parameter_names(name):
+    return [p.name for p in get_model(name)["parameters"]]
+
+def default_parameters(name):
+    """Returns the published (default) parameter vector of a model."""
+    return np.array([p.default for p in get_model(name)["parameters"]])
+
+def parameter_bounds(name):
+    """Returns the prior box of a model as (lower, upper) arrays."""
+    params = get_model(name)["parameters"]
+    return np.array([p.lower for p in params]), np.array([p.upper for p in params])
+
+def _as_columns(name, params):
+    """Converts a (n_sets, n_params) array into a dict of (n_sets, 1) columns."""
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    names = parameter_names(name)
+    if params.shape[1] != len(names):
+        raise ValueError(f"Model '{name}' expects {len(names)} parameters ({', '.join(names)}), "
+                         f"got {params.shape[1]}.")
+    return {key: params[:, i, None] for i, key in enumerate(names)}
+
+# --- Batched Interface ---
+def hubble_rate(name, z, params):
+    """H(z) in km/s/Mpc for every parameter set, shape (n_sets, n_z)."""
+    z = np.atleast_1d(np.asarray(z, dtype=float))
+    return get_model(name)["hubble"](z[None, :], _as_columns(name, params))
+
+def sound_horizon(name, params):
+    """Sound horizon at the drag epoch rd in Mpc, shape (n_sets,)."""
+    p = _as_columns(name, params)
+    rd = get_model(name)["rd"]
+    if rd is None:
+        return np.full(next(iter(p.values())).shape[0], RS_FIDUCIAL)
+    return np.broadcast_to(rd(p), (next(iter(p.values())).shape[0], 1))[:, 0]
+
+# Gauss-Legendre rule used on every integration interval in x = ln(1 + z)
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(8)
+MAX_STEP_LN1PZ = 0.05
+
+def integration_nodes(z_targets, max_step=MAX_STEP_LN1PZ):
+    """
+    Builds the quadrature layout shared by all parameter sets: interval
+    breakpoints contain every target redshift and are at most max_step apart
+    in ln(1 + z). Returns (z_nodes, jacobian_weights, n_intervals, target_index)
+    where target_index maps each target to its breakpoint.
+    """
+    z_targets = np.atleast_1d(np.asarray(z_targets, dtype=float))
+    x_targets = np.log1p(z_targets)
+    x_max = x_targets.max() if z_targets.size else 0.0
+    n_uniform = int(np.ceil(x_max / max_step)) + 1
+    breakpoints = np.unique(np.concatenate(([0.0], np.linspace(0.0, x_max, n_uniform), x_targets)))
+    lo, hi = breakpoints[:-1], breakpoints[1:]
+    half = 0.5 * (hi - lo)
+    x_nodes = (0.5 * (hi + lo))[:, None] + half[:, None] * _GL_NODES[None, :]
+    z_nodes = np.expm1(x_nodes).ravel()
+    # dz = (1 + z) dx
+    weights = (half[:, None] * _GL_WEIGHTS[None, :]).ravel() * (1.0 + z_nodes)
+    target_index = np.searchsorted(breakpoints, x_targets)
+    return z_nodes, weights, len(lo), target_index
+
+def set_distance_emulator(name, emulator):
+    """
+    Makes comoving_distance() use a surrogate for this model (see emulator.py)
+    for the parameter sets inside its box. Pass None to remove it.
+    """
+    get_model(name)["emulator"] = emulator
+
+def comoving_distance(name, z, params):
+    """
+    Line-of-sight comoving distance D_C(z) = int_0^z c / H(z') dz' in Mpc for
+    every parameter set, shape (n_sets, n_z). One batched H evaluation and one
+    cumulative sum serve all redshifts and all parameter sets.
+    """
+    z = np.atleast_1d(np.asarray(z, dtype=float))
+    emulator = get_model(name).get("emulator")
+    if emulator is not None:
+        params = np.atleast_2d(np.asarray(params, dtype=float))
+        inside = emulator.in_box(z, params)
+        if inside.all():
+            return emulator.comoving_distance(z, params)
+        if inside.any():
+            result = np.empty((params.shape[0], z.size))
+            result[inside] = emulator.comoving_distance(z, params[inside])
+            result[~inside] = integrate_comoving_distance(name, z, params[~inside])
+            return result
+    return integrate_comoving_distance(name, z, params)
+
+def integrate_comoving_distance(name, z, params):
+    """D_C(z) by direct integration, ignoring any distance emulator (its ground truth)."""
+    z_nodes, weights, n_intervals, target_index = integration_nodes(z)
+    integrand = c / hubble_rate(name, z_nodes, params) * weights[None, :]
+    per_interval = integrand.reshape(integrand.shape[0], n_intervals, -1).sum(axis=2)
+    cumulative = np.concatenate((np.zeros((per_interval.shape[0], 1)), np.cumsum(per_interval, axis=1)), axis=1)
+    return cumulative[:, target_index]
+
+def volume_averaged_distance(name, z, params):
+    """BAO volume-averaged distance D_V(z) in Mpc, shape (n_sets, n_z)."""
+    z = np.atleast_1d(np.asarray(z, dtype=float))
+    dm = comoving_distance(name, z, params)
+    hz = hubble_rate(name, z, params)
+    return (c * z[None, :] * dm**2 / hz)**(1.0/3.0)
+
+# ==============================================================================
+# REGISTERED MODELS
+# ==============================================================================
+
+RS_FIDUCIAL = 147.0   # LambdaCDM fiducial sound horizon in Mpc
+Z_DRAG = 1060.0
+
+def phi_z(z, Gamma, A1, A2, phi_inf=1.618, phi_0=2.85, z1=0.4, w1=0.3, z2=1.5, w2=0.4):
+    """Calculates the dynamic fractal dimension phi(z)."""
+    base = phi_inf + (phi_0 - phi_inf) * np.exp(-Gamma * z)
+    bao_bump_1 = A1 * np.exp(-0.5 * ((z - z1)/w1)**2)
+    bao_bump_2 = A2 * np.exp(-0.5 * ((z - z2)/w2)**2)
+    return base + bao_bump_1 + bao_bump_2
+
+def _phi_args(p):
+    """Selects the phi(z) arguments present in a column dict (others keep their defaults)."""
+    keys = ("Gamma", "A1", "A2", "phi_inf", "phi_0", "z1", "w1", "z2", "w2")
+    return {key: p[key] for key in keys if key in p}
+
+def _hubble_fractal(z, p):
+    OL = 1.0 - p["Om"]
+    phi = phi_z(z, **_phi_args(p))
+    term1 = p["Om"] * (1.0 + z)**(3.0 * phi)
+    term2 = OL * (1.0 + z)**(3.0 * (2.0 - phi))
+    return p["H0"] * np.sqrt(term1 + term2)
+
+def _rd_fractal(p):
+    phi_inf = p.get("phi_inf", 1.618)
+    phi_at_drag = phi_z(Z_DRAG, **_phi_args(p))
+    return RS_FIDUCIAL * (phi_at_drag / phi_inf)**(-0.75)
+
+def _hubble_lcdm(z, p):
+    OL = 1.0 - p["Om"]
+    return p["H0"] * np.sqrt(p["Om"] * (1.0 + z)**3 + OL)
+
+# Published GLOBAL best-fit values and prior box shared by the fractal variants
+_FRACTAL_PARAMETERS = [
+    Parameter("H0", 73.24, 50.0, 90.0),
+    Parameter("Om", 0.2974, 0.05, 0.6),
+    Parameter("Gamma", 0.433, 0.01, 3.0),
+    Parameter("A1", 0.031, -0.5, 0.5),
+    Parameter("A2", 0.019, -0.5, 0.5),
+]
+
+register_model(
+    "fractal", _hubble_fractal, _FRACTAL_PARAMETERS, rd=_rd_fractal,
+    description="Dynamic Fractal Model (phi_inf = 1.618, phi_0 = 2.85, fixed bumps)")
+
+register_model(
+    "lcdm", _hubble_lcdm,
+    [Parameter("H0", 73.24, 50.0, 90.0), Parameter("Om", 0.2974, 0.05, 0.6)],
+    description="Flat LambdaCDM (rd fixed to the 147 Mpc fiducial)")
+
+register_model(
+    "fractal_free_phi", _hubble_fractal,
+    _FRACTAL_PARAMETERS + [Parameter("phi_inf", 1.618, 1.2, 2.5), Parameter("phi_0", 2.85, 2.0, 3.5)],
+    rd=_rd_fractal,
+    description="Dynamic Fractal Model with free phi_inf and phi_0")
+
+register_model(
+    "fractal_free_bumps", _hubble_fractal,
+    _FRACTAL_PARAMETERS + [Parameter("z1", 0.4, 0.1, 1.0), Parameter("w1", 0.3, 0.05, 1.0),
+                           Parameter("z2", 1.5, 0.8, 2.5), Parameter("w2", 0.4, 0.05, 1.0)],
+    rd=_rd_fractal,
+    description="Dynamic Fractal Model with free bump centres and widths")
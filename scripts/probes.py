@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import os
+import model_registry as registry
+from derived_cache import derived_quantities
+from packed_covariance import PackedCovariance
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Batched Probe Likelihoods (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# Every probe exposes the same interface as the model registry:
+#
+#   PROBES[probe]["chi2"](model_name, params) -> chi2, shape (n_sets,)
+#
+# so any registered model can be scored on any probe, for many parameter
+# sets at once. The data are the same as in the standalone probe scripts.
+# ==============================================================================
+
+c = registry.c
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROBES = {}
+
+def register_probe(name, chi2, n_data, description=""):
+    """Registers a probe; chi2(model_name, params) must return shape (n_sets,)."""
+    PROBES[name] = {"name": name, "chi2": chi2, "n_data": n_data, "description": description}
+    return PROBES[name]
+
+def evaluate(model_name, params, probe_names=None):
+    """Returns {probe: chi2 array of shape (n_sets,)} for the selected probes."""
+    probe_names = probe_names or list(PROBES)
+    return {probe: PROBES[probe]["chi2"](model_name, params) for probe in probe_names}
+
+# --- Cosmic Chronometers (same data as Cosmic_Chronometers.py) ---
+data_cc = np.array([
+    [0.07, 69.0, 19.6], [0.09, 69, 12], [0.12, 68.6, 26.2], [0.17, 83, 8],
+    [0.179, 75, 4], [0.199, 75, 5], [0.20, 72.9, 29.6], [0.27, 77, 14],
+    [0.28, 88.8, 36.6], [0.352, 83, 14], [0.38, 83, 13.5], [0.4, 95, 17],
+    [0.4004, 77, 10.2], [0.425, 87.1, 11.2], [0.445, 92.8, 12.9],
+    [0.47, 89.0, 49.6], [0.4783, 80.9, 9], [0.48, 97, 62], [0.593, 104, 13],
+    [0.68, 92, 8], [0.75, 98.8, 33.6], [0.781, 105, 12], [0.875, 125, 17],
+    [0.88, 90, 40], [0.9, 117, 23], [1.037, 154, 20], [1.3, 168, 17],
+    [1.363, 160, 33.6], [1.43, 177, 18], [1.53, 140, 14], [1.75, 202, 40],
+    [1.965, 186.5, 50.4]
+])
+
+def chi2_cosmic_chronometers(model_name, params):
+    z, hz_obs, sigma = data_cc.T
+    hz_model = registry.hubble_rate(model_name, z, params)
+    return np.sum(((hz_obs - hz_model) / sigma)**2, axis=1)
+
+# --- BAO (same data as bao.py: D_V/rd at the first point, D_H/rd after) ---
+data_bao = np.array([[0.51, 13.09, 0.10], [0.71, 20.29, 0.30], [2.33, 32.18, 0.85]])
+
+def chi2_bao(model_name, params):
+    z, obs_ratios, sigma = data_bao.T
+    rd = derived_quantities(model_name, params)["rd"][:, None]
+    model_dist = c / registry.hubble_rate(model_name, z, params)
+    model_dist[:, 0] = registry.volume_averaged_distance(model_name, z[:1], params)[:, 0]
+    return np.sum(((obs_ratios - model_dist / rd) / sigma)**2, axis=1)
+
+# --- CMB angular scale theta* (same reference as CMB.py, z* = 1090) ---
+PLANCK_THETA_STAR = 0.0104085
+PLANCK_THETA_STAR_ERR = 0.000004
+
+def chi2_cmb_theta(model_name, params):
+    theta_star = derived_quantities(model_name, params)["theta_star"]
+    return ((theta_star - PLANCK_THETA_STAR) / PLANCK_THETA_STAR_ERR)**2
+
+# --- Local H0 (SH0ES, as in validate_bao_hz.py) ---
+H0_LOCAL = 73.24
+H0_LOCAL_ERR = 0.42
+
+def chi2_h0_local(model_name, params):
+    h0 = registry.hubble_rate(model_name, [0.0], params)[:, 0]
+    return ((h0 - H0_LOCAL) / H0_LOCAL_ERR)**2
+
+# --- Pantheon+ SNIa (same selection as SNIa.py) ---
+SNIA_DATA_FILE = os.path.join(SCRIPTS_DIR, 'Pantheon+SH0ES.dat')
+SNIA_COV_FILE = os.path.join(SCRIPTS_DIR, 'Pantheon+SH0ES_STAT+SYS.cov')
+_snia_cache = {}
+
+def load_snia():
+    """
+    Loads the non-calibrator Pantheon+ SNIa, sorted by redshift, and their
+    covariance in packed float32 storage (see packed_covariance.py). When the
+    STAT+SYS covariance file is not available, the diagonal MU_SH0ES errors
+    are used instead.
+    """
+    if _snia_cache:
+        return _snia_cache
+    df = pd.read_csv(SNIA_DATA_FILE, sep=r'\s+', comment='#')
+    is_calibrator_mask = (df['IS_CALIBRATOR'] == 1)
+    non_calibrator_indices = df.index[~is_calibrator_mask].values
+    order = np.argsort(df['zHD'].values[non_calibrator_indices], kind='stable')
+    selected = non_calibrator_indices[order]
+
+    if os.path.exists(SNIA_COV_FILE):
+        cov_matrix = PackedCovariance.from_text(SNIA_COV_FILE, indices=selected, dtype=np.float32)
+        covariance = "STAT+SYS"
+    else:
+        cov_matrix = PackedCovariance.from_diagonal(df['MU_SH0ES_ERR_DIAG'].values[selected]**2)
+        covariance = "diagonal"
+
+    _snia_cache.update({
+        "z": df['zHD'].values[selected],
+        "mu": df['MU_SH0ES'].values[selected],
+        "cov": cov_matrix,
+        "covariance": covariance,
+    })
+    return _snia_cache
+
+def chi2_snia(model_name, params):
+    sn = load_snia()
+    dl = (1.0 + sn["z"])[None, :] * registry.comoving_distance(model_name, sn["z"], params)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mu_model = np.where(dl > 0, 5 * np.log10(dl) + 25, np.inf)
+    diff = sn["mu"][None, :] - mu_model
+    return sn["cov"].chi2(diff.T)
+
+def _n_snia():
+    return len(load_snia()["z"])
+
+register_probe("cosmic_chronometers", chi2_cosmic_chronometers, len(data_cc), "H(z) cosmic chronometers")
+register_probe("bao", chi2_bao, len(data_bao), "DESI BAO distance ratios")
+register_probe("cmb_theta", chi2_cmb_theta, 1, "Planck angular sound horizon theta*")
+register_probe("h0_local", chi2_h0_local, 1, "SH0ES local H0")
+register_probe("snia", chi2_snia, _n_snia, "Pantheon+ SNIa distance moduli")
+
+def n_data(probe_name):
+    """Number of data points of a probe (loaded lazily for the SNIa sample)."""
+    n = PROBES[probe_name]["n_data"]
+    return n() if callable(n) else n
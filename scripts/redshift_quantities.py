@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+import sys
+import json
+import time
+import argparse
+import model_registry as registry
+
+# ==============================================================================
+# Dynamic Fractal Cosmological Model - Derived Quantities Calculator (v2.0)
+#
+# Author: Sylvain Herbin (ORCID: 0009-0001-3390-5012)
+# Website: www.phi-z.space
+#
+# This script computes H(z), D_M, D_A, D_L, D_V, mu, lookback time and age
+# for any list of redshifts and one or more parameter sets of a registered
+# model. Each parameter set needs a single cumulative integration pass; the
+# requested redshifts are then served by cubic Hermite interpolation of the
+# tabulated integrals (whose derivatives are known exactly), so the cost per
+# redshift is constant and the input is streamed in chunks with bounded memory.
+#
+# Usage:
+#   python redshift_quantities.py --z 0.1 0.5 1.0
+#   python redshift_quantities.py --file redshifts.txt --output out.csv
+#   python redshift_quantities.py --file z.npy --params 73.24,0.2974,0.433,0.031,0.019 \
+#       --params 70,0.3,0.433,0.031,0.019 --format bin --output out.bin
+#
+# Input files hold one redshift per line (text) or a 1-D .npy array.
+# ==============================================================================
+
+c = registry.c
+# 1 / (km/s/Mpc) expressed in Gyr
+HUBBLE_TIME_GYR = 977.7922216807891
+# Upper limit of the age integral (the integrand decays as a power of 1 + z)
+Z_AGE_LIMIT = 1.0e8
+# Spacing of the tabulation grid in ln(1 + z)
+TABLE_STEP = 1.0e-3
+
+COLUMNS = ["set", "z", "H", "D_M", "D_A", "D_L", "D_V", "mu", "lookback_Gyr", "age_Gyr"]
+
+def build_table(model_name, params, z_max):
+    """
+    Tabulates D_C(z) and the lookback time on a grid uniform in ln(1 + z) up to
+    z_max with one cumulative integration, and the age of the Universe.
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=float))[:1]
+    n_grid = int(np.ceil(np.log1p(z_max) / TABLE_STEP)) + 1
+    z_grid = np.expm1(np.linspace(0.0, np.log1p(z_max), n_grid))
+    z_all = np.append(z_grid, Z_AGE_LIMIT)
+
+    z_nodes, weights, n_intervals, target_index = registry.integration_nodes(z_all)
+    inv_h = 1.0 / registry.hubble_rate(model_name, z_nodes, params)[0]
+
+    def cumulative(values):
+        per_interval = (values * weights).reshape(n_intervals, -1).sum(axis=1)
+        return np.concatenate(([0.0], np.cumsum(per_interval)))[target_index]
+
+    dc = c * cumulative(inv_h)
+    lookback = cumulative(inv_h / (1.0 + z_nodes)) * HUBBLE_TIME_GYR
+    return {
+        "model": model_name, "params": params, "z": z_grid, "z_max": z_max,
+        "dc": dc[:-1], "lookback": lookback[:-1], "age_today": lookback[-1],
+        # Exact derivatives d/dz at the grid nodes, used by the Hermite interpolation
+        "dc_slope": c / registry.hubble_rate(model_name, z_grid, params)[0],
+    }
+
+def _hermite(z_grid, values, slopes, z):
+    """Cubic Hermite interpolation with known derivatives."""
+    i = np.clip(np.searchsorted(z_grid, z) - 1, 0, len(z_grid) - 2)
+    h = z_grid[i + 1] - z_grid[i]
+    t = (z - z_grid[i]) / h
+    t2, t3 = t * t, t * t * t
+    return ((2 * t3 - 3 * t2 + 1) * values[i] + (t3 - 2 * t2 + t) * h * slopes[i]
+            + (-2 * t3 + 3 * t2) * values[i + 1] + (t3 - t2) * h * slopes[i + 1])
+
+def evaluate_table(table, z):
+    """Returns every quantity of COLUMNS (except 'set') at the redshifts z."""
+    z = np.asarray(z, dtype=float)
+    if z.size and (z.min() < 0.0 or z.max() > table["z_max"]):
+        raise ValueError(f"Redshifts must lie in [0, {table['z_max']:g}], got values in [{z.min():g}, {z.max():g}].")
+    hz = registry.hubble_rate(table["model"], z, table["params"])[0]
+    dm = _hermite(table["z"], table["dc"], table["dc_slope"], z)
+    lookback_slope = table["dc_slope"] / (c * (1.0 + table["z"])) * HUBBLE_TIME_GYR
+    lookback = _hermite(table["z"], table["lookback"], lookback_slope, z)
+    dl = (1.0 + z) * dm
+    with np.errstate(divide='ignore'):
+        mu = 5 * np.log10(dl) + 25
+    return {
+        "z": z, "H": hz, "D_M": dm, "D_A": dm / (1.0 + z), "D_L": dl,
+        "D_V": np.cbrt(c * z * dm**2 / hz), "mu": mu,
+        "lookback_Gyr": lookback, "age_Gyr": table["age_today"] - lookback,
+    }
+
+def compute_quantities(model_name, z, params):
+    """
+    Array interface: returns {quantity: array of shape (n_sets, n_z)} for the
+    redshifts z and every parameter set in params.
+    """
+    z = np.atleast_1d(np.asarray(z, dtype=float))
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    z_max = max(z.max(initial=0.0), 1e-3)
+    rows = [evaluate_table(build_table(model_name, p, z_max), z) for p in params]
+    return {name: np.vstack([row[name] for row in rows]) for name in COLUMNS[1:]}
+
+# --- Streaming ---
+def iter_redshifts(path, chunk_size):
+    """Yields chunks of redshifts from a text file (one per line) or a .npy array."""
+    if path.endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+        for start in range(0, data.shape[0], chunk_size):
+            yield np.asarray(data[start:start + chunk_size], dtype=float).ravel()
+    else:
+        for chunk in pd.read_csv(path, header=None, comment='#', sep=r'\s+', usecols=[0], chunksize=chunk_size):
+            yield chunk[0].values.astype(float)
+
+def scan_z_range(path, chunk_size):
+    """Smallest and largest redshift of an input file (one read-only pass)."""
+    z_min, z_max = np.inf, -np.inf
+    for chunk in iter_redshifts(path, chunk_size):
+        z_min, z_max = min(z_min, chunk.min(initial=np.inf)), max(z_max, chunk.max(initial=-np.inf))
+    return z_min, z_max
+
+def stream_quantities(model_name, params, chunks, out, fmt="csv", z_max=None):
+    """
+    Writes one row per (parameter set, redshift) to the open file out, chunk
+    by chunk. Every parameter set is tabulated once; chunks is a callable
+    returning a fresh iterator of redshift arrays. Returns the number of rows.
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    n_rows = 0
+    if fmt == "csv":
+        out.write(",".join(COLUMNS) + "\n")
+    for set_index, p in enumerate(params):
+        table = build_table(model_name, p, z_max)
+        for z in chunks():
+            values = evaluate_table(table, z)
+            block = np.column_stack([np.full(z.size, set_index, dtype=float)] + [values[name] for name in COLUMNS[1:]])
+            if fmt == "csv":
+                np.savetxt(out, block, delimiter=",", fmt=["%d"] + ["%.10g"] * (len(COLUMNS) - 1))
+            else:
+                out.write(np.ascontiguousarray(block, dtype="<f8").tobytes())
+            n_rows += z.size
+    return n_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="H, D_M, D_A, D_L, D_V, mu, lookback time and age for many redshifts.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--z", type=float, nargs="+", help="Redshifts given on the command line.")
+    source.add_argument("--file", help="Text file (one redshift per line) or 1-D .npy file.")
+    parser.add_argument("--model", default="fractal", choices=list(registry.MODELS))
+    parser.add_argument("--params", action="append", metavar="V1,V2,...",
+                        help="Parameter set (comma-separated, registry order); repeat for several sets. "
+                             "Default: the model's published values.")
+    parser.add_argument("--output", help="Output file (default: CSV on stdout).")
+    parser.add_argument("--format", choices=["csv", "bin"], default="csv",
+                        help="csv, or bin: little-endian float64 rows with a JSON sidecar describing the columns.")
+    parser.add_argument("--chunk-size", type=int, default=250000, help="Redshifts processed per chunk.")
+    args = parser.parse_args()
+
+    if args.params:
+        params = np.array([[float(v) for v in item.split(",")] for item in args.params])
+    else:
+        params = registry.default_parameters(args.model)[None, :]
+    if args.z:
+        z_values = np.array(args.z)
+        chunks = lambda: (z_values[i:i + args.chunk_size] for i in range(0, z_values.size, args.chunk_size))
+        z_min, z_max = z_values.min(), z_values.max()
+    else:
+        chunks = lambda: iter_redshifts(args.file, args.chunk_size)
+        z_min, z_max = scan_z_range(args.file, args.chunk_size)
+    if z_min < 0.0:
+        parser.error(f"redshifts must be non-negative; the input spans [{z_min:g}, {z_max:g}].")
+    z_max = max(z_max, 1e-3)
+
+    if args.format == "bin" and not args.output:
+        parser.error("--format bin requires --output.")
+
+    started_at = time.perf_counter()
+    if args.output:
+        with open(args.output, "w" if args.format == "csv" else "wb") as out:
+            n_rows = stream_quantities(args.model, params, chunks, out, args.format, z_max)
+    else:
+        n_rows = stream_quantities(args.model, params, chunks, sys.stdout, "csv", z_max)
+
+    if args.output:
+        if args.format == "bin":
+            with open(args.output + ".json", "w") as f:
+                json.dump({"columns": COLUMNS, "dtype": "<f8", "n_rows": n_rows, "model": args.model,
+                           "parameter_names": registry.parameter_names(args.model),
+                           "parameters": params.tolist()}, f, indent=2)
+        print(f"-> Wrote {n_rows} rows for {len(params)} parameter set(s) to {args.output} "
+              f"in {time.perf_counter() - started_at:.2f} s.")